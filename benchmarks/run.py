@@ -0,0 +1,417 @@
+"""
+Benchmark suite of group_action
+
+Kernels and end-to-end commands are each run in a child process, so that peak RSS is measured per benchmark.
+Results are appended to a JSON history and compared against a stored baseline.
+Everything runs offline with the standard library and the package dependencies only.
+
+Usage:
+	python benchmarks/run.py                          run every benchmark and append results to the history
+	python benchmarks/run.py --save-baseline          also store results as the new baseline
+	python benchmarks/run.py --only kernel --n 4      run the kernels only, up to 4 inputs
+	python benchmarks/run.py --only cold-start        time the startup of commands on tiny problems only
+	python benchmarks/run.py --threshold 0.1          fail when a benchmark is 10% slower than the baseline
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+
+# benchmarking the working tree rather than an installed release
+sys.path.insert(0, ROOT_DIRECTORY)
+
+"""
+Kernels
+Each kernel takes a number of inputs, prepares its data and returns a (run, elements) pair.
+run is the timed callable and elements the number of elements it processes, for throughput.
+"""
+
+def kernel_action(n):
+	"""
+	Natural action of every permutation of Sn on sampled functions, followed by compute_signature
+	"""
+	from group_action.library import generate_symmetric_group, generate_function, action, compute_signature
+	random.seed(n)
+	permutations = list(generate_symmetric_group(n))
+	functions = [generate_function(random.getrandbits(2**n), n) for _ in range(64)]
+
+	def run():
+		for permutation in permutations:
+			for f in functions:
+				compute_signature(action(permutation, f), n)
+
+	return run, len(permutations) * len(functions)
+
+def kernel_swap_variables(n):
+	"""
+	Delta swap of every transposition of Sn on every n-input signature
+	"""
+	from group_action.library import generate_transpositions, swap_variables
+	transpositions = generate_transpositions(n)
+	size = 2**(2**n)
+
+	def run():
+		for i, j in transpositions:
+			for signature in range(size):
+				swap_variables(signature, i, j, n)
+
+	return run, len(transpositions) * size
+
+def kernel_find_connected_components(n):
+	"""
+	Connected components of the graph of n-input signatures linked by transpositions
+	"""
+	from group_action.library import generate_transpositions, swap_variables, find_connected_components
+	size = 2**(2**n)
+	vertices = list(range(size))
+	edges = [(signature, swap_variables(signature, i, j, n)) for i, j in generate_transpositions(n) for signature in vertices]
+
+	def run():
+		find_connected_components(vertices, edges)
+
+	return run, len(edges)
+
+def kernel_find_components_from_images(n):
+	"""
+	Label propagation over the image array of n-input signatures under transpositions
+	"""
+	import numpy as np
+	from group_action.library import generate_transpositions, swap_variables, find_components_from_images
+	size = 2**(2**n)
+	images = np.array([[swap_variables(signature, i, j, n) for signature in range(size)] for i, j in generate_transpositions(n)], dtype=np.uint64)
+
+	def run():
+		find_components_from_images(images)
+
+	return run, images.size
+
+def kernel_conjugation(n):
+	"""
+	Conjugation of every permutation of Sn by every transposition
+	"""
+	from group_action.library import generate_symmetric_group, generate_transpositions, convert_transposition_to_permutation
+	from group_action.conjugacy_classes import conjugation
+	permutations = list(generate_symmetric_group(n))
+	transpositions = [convert_transposition_to_permutation(transposition, n) for transposition in generate_transpositions(n)]
+
+	def run():
+		for permutation1 in transpositions:
+			for permutation2 in permutations:
+				conjugation(permutation1, permutation2)
+
+	return run, len(transpositions) * len(permutations)
+
+def kernel_generate_cyclic_group(n):
+	"""
+	Cyclic group generated by every permutation of Sn
+	"""
+	from group_action.library import generate_symmetric_group
+	from group_action.burnside import generate_cyclic_group
+	permutations = list(generate_symmetric_group(n))
+
+	def run():
+		for permutation in permutations:
+			generate_cyclic_group(permutation)
+
+	return run, len(permutations)
+
+def kernel_action3(n):
+	"""
+	Action of every generator on every hypergraph over n elements
+	"""
+	from group_action.powerset import generate_generators, generate_hypergraphs, action3
+	generators = generate_generators(n)
+	hypergraphs = generate_hypergraphs(n)
+
+	def run():
+		for g in generators:
+			for hypergraph in hypergraphs:
+				action3(g, hypergraph, n)
+
+	return run, len(generators) * len(hypergraphs)
+
+def kernel_generate_canonical_orbits(n):
+	"""
+	Orbits of n-input signatures by the canonical walk
+	"""
+	from group_action.library import generate_canonical_orbits
+
+	def run():
+		for orbit in generate_canonical_orbits(n):
+			pass
+
+	return run, 2**(2**n)
+
+def kernel_canonical_signature(n):
+	"""
+	Canonical signature of sampled n-input signatures
+	"""
+	from group_action.canon import canonical_signature
+	random.seed(n)
+	signatures = [random.getrandbits(2**n) for _ in range(1024)]
+
+	def run():
+		for signature in signatures:
+			canonical_signature(signature, n)
+
+	return run, len(signatures)
+
+def kernel_compute_weight_enumerator(n):
+	"""
+	Polya's enumeration of the orbits of n-input functions by weight
+	"""
+	from group_action.polya import compute_weight_enumerator, compute_cycles_by_weight
+
+	def run():
+		compute_cycles_by_weight.cache_clear()
+		compute_weight_enumerator(n)
+
+	return run, 2**(2**n)
+
+# name: (kernel, numbers of inputs)
+KERNELS = {
+	"action": (kernel_action, [2, 3, 4, 5]),
+	"swap_variables": (kernel_swap_variables, [2, 3, 4]),
+	"find_connected_components": (kernel_find_connected_components, [2, 3, 4]),
+	"find_components_from_images": (kernel_find_components_from_images, [2, 3, 4]),
+	"conjugation": (kernel_conjugation, [3, 4, 5, 6]),
+	"generate_cyclic_group": (kernel_generate_cyclic_group, [3, 4, 5, 6]),
+	"action3": (kernel_action3, [2, 3, 4]),
+	"generate_canonical_orbits": (kernel_generate_canonical_orbits, [2, 3, 4]),
+	"canonical_signature": (kernel_canonical_signature, [3, 4, 5, 6]),
+	"compute_weight_enumerator": (kernel_compute_weight_enumerator, [4, 6, 8]),
+}
+
+"""
+End-to-end commands
+Each command is given as module arguments and a function of n giving the number of elements it processes.
+"""
+
+COMMANDS = {
+	"orbits": (["group_action.orbits"], lambda n: 2**(2**n), [2, 3, 4]),
+	"orbits_canonical": (["group_action.orbits", "--method", "canonical"], lambda n: 2**(2**n), [2, 3, 4]),
+	"powerset": (["group_action.powerset"], lambda n: 2**(2**n), [2, 3, 4]),
+	"conjugacy_classes": (["group_action.conjugacy_classes"], lambda n: math.factorial(n), [2, 3, 4, 5]),
+	"conjugacy_classes_brute_force": (["group_action.conjugacy_classes", "--method", "brute-force"], lambda n: math.factorial(n), [2, 3, 4, 5]),
+	"burnside": (["group_action.burnside", "--by-weight"], lambda n: 2**(2**n), [2, 3, 4, 5]),
+}
+
+"""
+Cold starts
+Each command is run on a tiny problem with the default number of cores and without banner, as scripts calling it
+thousands of times do, so that its wall time is dominated by interpreter startup and imports.
+Running group_action.library as a module only imports it. burnside, orbit, canon and symmetric_functions never
+import numpy, joblib nor tqdm on tiny problems, while orbits and conjugacy_classes import numpy through sinks.
+"""
+
+COLD_STARTS = {
+	"import": (["group_action.library"], [2]),
+	"symmetric_functions": (["group_action.symmetric_functions"], [2, 3]),
+	"orbit": (["group_action.orbit", "--s", "6"], [2, 3]),
+	"orbits": (["group_action.orbits"], [2, 3]),
+	"burnside": (["group_action.burnside"], [2, 3]),
+	"canon": (["group_action.canon", "--s", "6"], [2, 3]),
+	"conjugacy_classes": (["group_action.conjugacy_classes"], [2, 3]),
+}
+
+def run_kernel(name, n, repeat):
+	"""
+	Run a kernel in the current process, keeping the best wall time of repeat runs
+	"""
+	kernel, _ = KERNELS[name]
+	run, elements = kernel(n)
+	best = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		run()
+		duration = time.perf_counter() - start
+		best = duration if best is None else min(best, duration)
+	return best, elements
+
+def run_child(command, env=None):
+	"""
+	Run a child process, returning its wall time, its peak RSS in KiB and its standard output
+	"""
+	start = time.perf_counter()
+	process = subprocess.Popen(command, cwd=ROOT_DIRECTORY, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+	output = process.stdout.read()
+	process.stdout.close()
+	_, status, usage = os.wait4(process.pid, 0)
+	duration = time.perf_counter() - start
+	# the Popen object did not reap the child itself
+	process.returncode = os.waitstatus_to_exitcode(status)
+	if process.returncode != 0:
+		raise Exception(f"Benchmark command {' '.join(command)} failed with status {process.returncode}.")
+	return duration, usage.ru_maxrss, output
+
+def measure_kernel(name, n, repeat):
+	"""
+	Measure a kernel in a child process
+	"""
+	_, rss, output = run_child([sys.executable, os.path.abspath(__file__), "--worker", name, "--n", str(n), "--repeat", str(repeat)])
+	result = json.loads(output)
+	result["rss_kib"] = rss
+	return result
+
+def measure_command(name, n, repeat):
+	"""
+	Measure an end-to-end command on a single core, keeping the best wall time of repeat runs
+	"""
+	arguments, count, _ = COMMANDS[name]
+	command = [sys.executable, "-m"] + arguments + ["--n", str(n), "--c", "1"]
+	env = dict(os.environ, TQDM_DISABLE="1", PYTHONPATH=ROOT_DIRECTORY)
+	best, peak = None, 0
+	for _ in range(repeat):
+		duration, rss, _ = run_child(command, env)
+		best = duration if best is None else min(best, duration)
+		peak = max(peak, rss)
+	return {"wall_s": best, "rss_kib": peak, "elements": count(n)}
+
+def measure_cold_start(name, n, repeat):
+	"""
+	Measure the cold start of a command, keeping the best wall time of repeat runs
+	"""
+	arguments, _ = COLD_STARTS[name]
+	command = [sys.executable, "-m"] + arguments + ["--n", str(n), "--no-banner"]
+	env = dict(os.environ, PYTHONPATH=ROOT_DIRECTORY)
+	best, peak = None, 0
+	for _ in range(repeat):
+		duration, rss, _ = run_child(command, env)
+		best = duration if best is None else min(best, duration)
+		peak = max(peak, rss)
+	return {"wall_s": best, "rss_kib": peak, "elements": 1}
+
+def generate_benchmarks(only, max_n):
+	"""
+	Generate the (kind, name, n) triples of the benchmarks to run
+	"""
+	if only in (None, "kernel"):
+		for name, (_, sizes) in KERNELS.items():
+			for n in sizes:
+				if n <= max_n:
+					yield "kernel", name, n
+	if only in (None, "end-to-end"):
+		for name, (_, _, sizes) in COMMANDS.items():
+			for n in sizes:
+				if n <= max_n:
+					yield "end-to-end", name, n
+	if only in (None, "cold-start"):
+		for name, (_, sizes) in COLD_STARTS.items():
+			for n in sizes:
+				if n <= max_n:
+					yield "cold-start", name, n
+
+def read_json(path, default):
+	"""
+	Read a JSON file, default if there is none yet
+	"""
+	if not os.path.exists(path):
+		return default
+	with open(path, 'r') as file:
+		return json.load(file)
+
+def write_json(path, data):
+	"""
+	Write a JSON file aside and rename it so that an interruption never leaves a partial file
+	"""
+	temporary_path = path + ".tmp"
+	with open(temporary_path, 'w') as file:
+		json.dump(data, file, indent=4)
+	os.replace(temporary_path, path)
+
+def compare(results, baseline, threshold):
+	"""
+	Compare results against a baseline
+	Returns the list of (key, wall time, baseline wall time) of the benchmarks slower than the baseline by more than threshold
+	"""
+	regressions = []
+	for key, result in results.items():
+		if key in baseline:
+			reference = baseline[key]["wall_s"]
+			if result["wall_s"] > reference * (1 + threshold):
+				regressions += [(key, result["wall_s"], reference)]
+	return regressions
+
+def main():
+	# Create the parser
+	parser = argparse.ArgumentParser(description='Benchmark suite of group_action, comparing wall time, peak RSS and throughput against a baseline.')
+
+	# Add the arguments
+	parser.add_argument('--n', type=int, default=5, help='Largest number of inputs')
+	parser.add_argument('--only', choices=['kernel', 'end-to-end', 'cold-start'], default=None, help='Run one kind of benchmarks only')
+	parser.add_argument('--filter', type=str, default=None, help='Run benchmarks whose name contains this string only')
+	parser.add_argument('--repeat', type=int, default=3, help='Number of runs per benchmark, the best one being kept')
+	parser.add_argument('--history', type=str, default=os.path.join(BENCHMARKS_DIRECTORY, 'history.json'), help='History file')
+	parser.add_argument('--baseline', type=str, default=os.path.join(BENCHMARKS_DIRECTORY, 'baseline.json'), help='Baseline file')
+	parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown against the baseline considered as a regression')
+	parser.add_argument('--save-baseline', action='store_true', help='Store results as the new baseline')
+	parser.add_argument('--worker', type=str, default=None, help=argparse.SUPPRESS)
+
+	# Parse the arguments
+	args = parser.parse_args()
+
+	# child process measuring a single kernel
+	if args.worker:
+		duration, elements = run_kernel(args.worker, args.n, args.repeat)
+		print(json.dumps({"wall_s": duration, "elements": elements}))
+		return
+
+	# Running benchmarks
+	results = {}
+	for kind, name, n in generate_benchmarks(args.only, args.n):
+		if args.filter and args.filter not in name:
+			continue
+		key = f"{kind}/{name}/{n}"
+		if kind == "kernel":
+			result = measure_kernel(name, n, args.repeat)
+		elif kind == "cold-start":
+			result = measure_cold_start(name, n, args.repeat)
+		else:
+			result = measure_command(name, n, args.repeat)
+		result["elements_per_s"] = result["elements"] / result["wall_s"] if result["wall_s"] else 0
+		results[key] = result
+		print(f"{key:50} {result['wall_s']:10.4f} s {result['rss_kib']:10} KiB {result['elements_per_s']:14.0f} elements/s")
+
+	# Appending results to the history
+	from group_action import __version__
+	run = {
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"version": __version__,
+		"python": platform.python_version(),
+		"machine": platform.machine(),
+		"cpus": os.cpu_count(),
+		"results": results,
+	}
+	history = read_json(args.history, [])
+	history += [run]
+	write_json(args.history, history)
+
+	# Comparing against the baseline
+	baseline = read_json(args.baseline, None)
+	status = 0
+	if baseline is None:
+		print(f"No baseline at {args.baseline}")
+	else:
+		regressions = compare(results, baseline["results"], args.threshold)
+		for key, duration, reference in regressions:
+			print(f"Regression: {key} {duration:.4f} s against {reference:.4f} s in version {baseline['version']}")
+		if regressions:
+			status = 1
+		else:
+			print(f"No regression beyond {args.threshold:.0%} against version {baseline['version']}")
+
+	if args.save_baseline:
+		write_json(args.baseline, run)
+
+	sys.exit(status)
+
+if __name__ == '__main__':
+	main()
@@ -1,8 +1,7 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.polya import compute_weight_enumerator, compute_cycles_by_weight
 import copy
-import subprocess
-import os
 
 def translate_left(permutation, bits):
 	return [bits[permutation[k]] for k in range(len(bits))]
@@ -17,10 +16,15 @@ def generate_cyclic_group(permutation):
 
 	return cyclic_group
 
+def compute_burnside_terms(n):
+	"""
+	Compute the terms of Burnside's formula as (class size, exponent) pairs
+	There is one term per conjugacy class of Sn, namely per cycle type, ordered by class representative
+	"""
+	cycle_types = sorted(generate_partitions(n), key=compute_cycle_type_representative)
+	return [(compute_cycle_type_size(cycle_type), cycles_on_cube(cycle_type)) for cycle_type in cycle_types]
 
 def main():
-	print_header()
-
 	# Create the parser
 	parser = argparse.ArgumentParser(description="Build Burside's formula and compute the number of orbits generated by the action of the symmetric group Sn on the set of n-input Boolean functions B^{B^n}")
 
@@ -28,12 +32,19 @@ def main():
 	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
 	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
+	parser.add_argument('--by-weight', action='store_true', help='Output the number of orbits per weight')
+	parser.add_argument('--weights', type=int, nargs='+', default=None, help='Weight of an input vector per Hamming weight')
+	parser.add_argument('--cache', type=str, default=None, help='Cycle count cache file, shared across invocations')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+	profiler.track_cache("cycles_on_cube", cycles_on_cube)
+	profiler.track_cache("compute_cycles_by_weight", compute_cycles_by_weight)
 
 	"""
 	Initialize Default value
@@ -45,74 +56,62 @@ def main():
 	# number of cores
 	num_cores=args.c
 
-	# build conjugacy classes
-	command = f"conjugacy_classes --n {n} --c {num_cores} --j"
-	result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-	if result.stderr != '':
-		print(result.stderr)
-	
-	# get conjugacy classes data from data.json file
-	fullInputFileName = "data.json"
-	with open(fullInputFileName, 'r') as fid:
-		data = json.load(fid)
-		os.remove(fullInputFileName)
+	# orbits per weight output
+	by_weight = args.by_weight
+
+	# weights of input vectors
+	weights = args.weights
 
-	# set under action to compute Burnside's formula
-	set_under_action = list(range(2**n))
+	# cycle count cache file
+	cache = args.cache
 
-	# Generating vertices
-	vertices = set_under_action
+	if cache:
+		load_cycle_type_cache(cache)
 
 	acc = 0
 	formula = ""
 
-	# for each item of dtat
-	for i, item in enumerate(data):
-
-		if i>0:
-			formula += " + "
+	# for each conjugacy class
+	with profiler.phase("burnside formula computing") as record:
+		for i, (size, exponent) in enumerate(compute_burnside_terms(n)):
 
-		# get conjugacy class size and representative
-		index, size, string = tuple(item.values())
+			if i>0:
+				formula += " + "
 
-		# format representative
-		representative = []
-		if string != '':
-			representative = list(map(int,string.split(",")))
-		
-		# generate cyclic group <s>
-		cyclic_group = generate_cyclic_group(representative)
+			# accumulate int and string
+			acc += size * (1<<exponent)
+			formula += f"{size}.2^{exponent}"
 
-		# edges
-		edges = []
+			record["items"] += 1
 
-		# action of <s> on range(2**n) by translation to the left
-		for permutation in cyclic_group:
-			for k in set_under_action:
-				bits = convert_int_to_bits(k, n)
-				translated = translate_left(permutation, bits)
-				translated_k = convert_bits_to_int(translated)
-				edges += [[k, translated_k]]
-
-		# Compute orbits
-		orbits = find_connected_components(vertices, edges)
-
-		# return number of orbits as the expected exponent
-		exponent = len(orbits)
-
-		# accumulate int and string
-		acc += size * (1<<exponent)
-		formula += f"{size}.2^{exponent}"
-
-	# finish
-	final_value = acc // math.factorial(n)
-	final_formula = "\\frac{1}{"+f"{n}"+"!}(" + formula + ")"
+		# finish
+		final_value = acc // math.factorial(n)
+		final_formula = "\\frac{1}{"+f"{n}"+"!}(" + formula + ")"
 	
-	print(f"Number of inputs: {n}")
-	print(f"Burnside's formula: {final_formula}")
-	print(f"Number of orbits: {final_value}")
-
-	print_footer()
+	# the number of orbits is about 2^2^n/n!, far beyond the default integer string conversion limit
+	sys.set_int_max_str_digits(0)
+
+	with profiler.phase("printing") as record:
+		print(f"Number of inputs: {n}")
+		print(f"Burnside's formula: {final_formula}")
+		print(f"Number of orbits: {final_value}")
+
+	if by_weight:
+		# Polya's enumeration
+		with profiler.phase("polya enumeration") as record:
+			enumerator = compute_weight_enumerator(n, weights)
+			record["items"] = len(enumerator)
+		print("Number of orbits per weight:")
+		for weight, count in enumerate(enumerator):
+			if count:
+				print(f"weight: {weight}, orbits: {count}")
+
+	if cache:
+		save_cycle_type_cache(cache)
+
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 	
 if __name__ == '__main__':
 	main()
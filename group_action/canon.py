@@ -0,0 +1,140 @@
+from group_action import __version__, __num_of_cores__
+from group_action.library import *
+
+def compute_symmetry_classes(signature, n):
+	"""
+	Compute the classes of interchangeable variables of a Boolean function
+	Variables i and j are interchangeable when swapping them leaves the function unchanged, which is an equivalence relation
+	Swaps are only checked between variables with the same number of ones in their positive cofactors
+	"""
+	masks = compute_variable_masks(n)
+	ones = [(signature & mask).bit_count() for mask in masks]
+	classes = []
+	for i in range(n):
+		for symmetry_class in classes:
+			j = symmetry_class[0]
+			if ones[i] == ones[j]:
+				if swap_variables(signature, j, i, n) == signature:
+					symmetry_class.append(i)
+					break
+		else:
+			classes.append([i])
+	return classes
+
+def search_canonical_signature(signature, n):
+	"""
+	Search the permutations of the variables leading to the minimal signature of the orbit
+	Returns the minimal signature, the number of surviving orderings and the classes of interchangeable variables
+
+	Variables are assigned to positions 0, 1, ... in turn. Once k of them are assigned, the 2^k most significant bits
+	of the permuted signature are known, since the unassigned variables are all 1 there. Only the orderings with the
+	smallest known prefix are kept, and interchangeable variables are only tried once per class, so the search stays
+	exact without enumerating n! permutations.
+	"""
+	classes = compute_symmetry_classes(signature, n)
+	class_of = {i: c for c, symmetry_class in enumerate(classes) for i in symmetry_class}
+	bits = convert_int_to_bits(signature, 1<<n)
+	full = (1<<n) - 1
+
+	# candidate: (assigned variables, positions read for the known prefix, known prefix)
+	candidates = [((), [full], bits[full])]
+	for k in range(n):
+		best = None
+		extended = []
+		for assigned, positions, prefix in candidates:
+			tried = set()
+			for v in range(n):
+				if v in assigned or class_of[v] in tried:
+					continue
+				tried.add(class_of[v])
+				# positions where variable v, now at position k, is 0
+				block_positions = [position & ~(1<<v) for position in positions]
+				block = convert_bits_to_int([bits[position] for position in block_positions])
+				new_prefix = (prefix << (1<<k)) | block
+				if best is None or new_prefix < best:
+					best = new_prefix
+					extended = []
+				if new_prefix == best:
+					extended.append((assigned + (v,), block_positions + positions, new_prefix))
+		candidates = extended
+
+	return candidates[0][2], len(candidates), classes
+
+def canonical_signature(signature, n):
+	"""
+	Compute the canonical signature of a Boolean function, namely the minimal signature of its orbit under Sn
+	"""
+	return search_canonical_signature(signature, n)[0]
+
+def compute_stabilizer_order(signature, n):
+	"""
+	Compute the order of the stabilizer of a Boolean function in Sn
+	The surviving orderings of the canonical search are the permutations leading to the canonical signature, namely a coset
+	of the stabilizer, each of them standing for the prod |class|! rearrangements of interchangeable variables
+	"""
+	# a permutation fixing the function preserves the number of ones of each positive cofactor, so distinct counts leave only the identity
+	ones = [(signature & mask).bit_count() for mask in compute_variable_masks(n)]
+	if len(set(ones)) == n:
+		return 1
+
+	_, count, classes = search_canonical_signature(signature, n)
+	return count * math.prod(math.factorial(len(symmetry_class)) for symmetry_class in classes)
+
+def compute_orbit_size(signature, n):
+	"""
+	Compute the size of the orbit of a Boolean function under Sn without enumerating it
+	Orbit-stabilizer theorem: |orbit| = n!/|Stab(f)|
+	"""
+	return math.factorial(n) // compute_stabilizer_order(signature, n)
+
+def read_signatures(filename):
+	"""
+	Read whitespace separated signatures from a file, - meaning standard input
+	"""
+	if filename == '-':
+		return [int(token) for token in sys.stdin.read().split()]
+	with open(filename, 'r') as file:
+		return [int(token) for token in file.read().split()]
+
+def main():
+	# Create the parser
+	parser = argparse.ArgumentParser(description='Computation of the canonical signature, namely the minimal signature of the orbit, of n-input, 1-output Boolean functions specified via their signatures as LE integers under the action of the symmetric group Sn.')
+
+	# Add the arguments
+	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+	parser.add_argument('--s', type=int, nargs='+', default=[], help='Signatures')
+	parser.add_argument('--f', type=str, default=None, help='File of signatures, - for standard input')
+	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
+
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
+
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+	profiler.track_cache("compute_delta_swap_mask", compute_delta_swap_mask)
+
+	# signatures
+	signatures = args.s
+	if args.f is not None:
+		signatures = signatures + read_signatures(args.f)
+
+	# number of inputs
+	n=args.n
+
+	# Printing canonical signatures
+	with profiler.phase("canonicalization") as record:
+		print(f"Canonical signatures under the action of S{n} on 2^2^{n}")
+		for i, signature in enumerate(signatures):
+			if not 0 <= signature < 2**(2**n):
+				raise Exception(f"Signature {signature} out of range for {n} inputs.")
+			print(f"index: {i}, signature: {signature}, canonical: {canonical_signature(signature, n)}")
+		record["items"] = len(signatures)
+
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
+
+if __name__ == '__main__':
+	main()
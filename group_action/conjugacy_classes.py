@@ -1,5 +1,7 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.sinks import *
+import numpy as np
 
 def conjugation(perm1, perm2):
 	"""
@@ -20,22 +22,90 @@ def titi_task(permutation1, chunk, n):
 		partial_edges += [(",".join(map(str,permutation2)), ",".join(map(str,conjugate)))]
 	return partial_edges
 
-def task(transposition, chunk, n):
+def convert_rank_to_string(rank, n):
+	"""
+	Convert the rank of a permutation into its comma-joined output format
+	"""
+	return ",".join(map(str,unrank_permutation(rank, n)))
+
+def task(generator_index, start, stop, n, path):
 	"""
 	Atomic task
+	The chunk of permutations is generated locally from its range of ranks,
+	and the ranks of their conjugates are written into the shared image array
 	"""
-	partial_edges = []
-	permutation1 = convert_transposition_to_permutation(transposition, n)
-	for permutation in chunk:
-		conjugate = conjugation(permutation1, permutation)
-		partial_edges += [(",".join(map(str,permutation)), ",".join(map(str,conjugate)))]
-	return partial_edges
+	permutation1 = convert_transposition_to_permutation(generate_transpositions(n)[generator_index], n)
+	conjugates = [rank_permutation(conjugation(permutation1, permutation)) for permutation in generate_symmetric_group(n)[start:stop]]
+	images = attach_shared_array(path)
+	images[generator_index, start:stop] = conjugates
 
-def main():
-	print_header()
+def compute_conjugacy_classes_brute_force(n, num_cores, profiler=None):
+	"""
+	Compute the conjugacy classes of Sn by brute force as the orbits of the conjugations by transpositions
+	Returns a list of (size, representative, elements) triples ordered by representative, namely the smallest
+	permutation of the class in lexicographic order, elements being given by their ranks
+	"""
+	if profiler is None:
+		profiler = Profiler()
+
+	# Computing transpositions
+	transpositions = generate_transpositions(n)
+
+	# Total number of transpositions
+	transpositions_size = len(transpositions)
+
+	# Total number of permutations, each permutation being identified by its rank
+	permutations_size = math.factorial(n)
+
+	# Image of each permutation rank under each conjugation, written in place by the workers
+	with SharedArray((transpositions_size, permutations_size), np.uint64) as images:
+		with profiler.phase("image computing") as record:
+			with open_progress_bar(transpositions_size * permutations_size >= SEQUENTIAL_THRESHOLD, desc="Brut force orbit computing", total=transpositions_size * permutations_size, unit=" edges") as progress_bar, Scheduler(num_cores, caches=profiler.caches) as scheduler:
+				for _ in scheduler.map(task, transpositions_size, permutations_size, (n, images.path), progress_bar):
+					pass
+			profiler.record_scheduler(record, scheduler)
+
+		# Computing orbits
+		with profiler.phase("component finding") as record:
+			orbits = find_components_from_images(images.array)
+			record["items"] = images.array.size
+
+	return [(len(orbit), unrank_permutation(orbit[0], n), orbit) for orbit in orbits]
+
+def compute_conjugacy_classes_cycle_type(n, verbose=False):
+	"""
+	Compute the conjugacy classes of Sn from their cycle types, namely the integer partitions of n
+	Returns a list of (size, representative, elements) triples like compute_conjugacy_classes_brute_force,
+	elements being only enumerated in verbose mode
+	"""
+	classes = []
+	for cycle_type in generate_partitions(n):
+		representative = compute_cycle_type_representative(cycle_type)
+		classes += [(compute_cycle_type_size(cycle_type), representative, cycle_type)]
+	classes.sort(key=lambda item: item[1])
+
+	elements = defaultdict(list)
+	if verbose:
+		for rank, permutation in enumerate(generate_symmetric_group(n)):
+			elements[tuple(compute_cycle_type(permutation))] += [rank]
 
+	return [(size, representative, elements[tuple(cycle_type)] if verbose else None) for size, representative, cycle_type in classes]
+
+def convert_string_to_rank(string):
+	"""
+	Convert a permutation in its comma-joined output format into its rank, for packed outputs
+	"""
+	return rank_permutation([int(element) for element in string.split(",")])
+
+def make_legacy_record(index, representative, size, elements):
+	"""
+	Build an element of the legacy data.json
+	"""
+	return {"index": index, "size": size, "representative": representative}
+
+def main():
 	# Create the parser
-	parser = argparse.ArgumentParser(description='Brut force computation of conjugacy classes of the symmetric group Sn.')
+	parser = argparse.ArgumentParser(description='Computation of conjugacy classes of the symmetric group Sn from cycle types or by brut force.')
 
 	# Add the arguments
 	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
@@ -43,12 +113,19 @@ def main():
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
 	parser.add_argument('--v', action='store_true', help='Output every element of each orbit')
 	parser.add_argument('--j', action='store_true', help='Output data.json file')
+	parser.add_argument('--method', choices=['cycle-type', 'brute-force'], default='cycle-type', help='Conjugacy class computation method')
+	parser.add_argument('--verify', action='store_true', help='Cross-check cycle types against brute force')
+	parser.add_argument('--output', type=str, default=None, help='Conjugacy class output file, written as classes are computed')
+	parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=None, help='Conjugacy class output file format, guessed from its extension by default')
+	parser.add_argument('--quiet', action='store_true', help='Only print the number of conjugacy classes')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
 
 	"""
 	Initialize Default value
@@ -66,70 +143,78 @@ def main():
 	# json data output
 	json_data_output = args.j
 
-	# Computing transpositions
-	transpositions = generate_transpositions(n)
-
-	# Total number of transpositions
-	transpositions_size = len(transpositions)
-
-	# Computing symmetric group
-	permutations = generate_symmetric_group(n)
-	
-	# Total number of permutations
-	permutations_size = len(permutations)
-
-	# Define the chunk size
-	chunk_size = 2**(math.floor(n/2))
-
-	# Define the number of jobs
-	num_jobs = transpositions_size * permutations_size // chunk_size
-
-	# Split the list into chunks
-	chunks = chunk_list(permutations, chunk_size)
+	# conjugacy class computation method
+	method = args.method
 
-	with tqdm_joblib(tqdm(desc="Brut force orbit computing", total=num_jobs)) as progress_bar:
-		results = Parallel(n_jobs=num_cores)(delayed(task)(transposition, chunk, n) for transposition in transpositions for chunk in chunks)
+	# brute force cross-check
+	verify = args.verify
 
-	# Generating vertices
-	vertices = [",".join(map(str,permutation)) for permutation in permutations]
+	# conjugacy class output file and format
+	output_path = args.output
+	output_format = args.output_format
 
-	# Merging list of lists
-	edges = list(itertools.chain.from_iterable(results))
+	# console output of the number of conjugacy classes only
+	quiet = args.quiet
 
-	# Computing orbits
-	orbits = find_connected_components(vertices, edges)
+	# Computing conjugacy classes
+	if method == 'cycle-type':
+		with profiler.phase("cycle type computing") as record:
+			classes = compute_conjugacy_classes_cycle_type(n, verbose)
+			record["items"] = len(classes)
+	else:
+		classes = compute_conjugacy_classes_brute_force(n, num_cores, profiler)
 
-	size = len(orbits)
-
-	# data list
-	data = []
+	if verify:
+		# Computing conjugacy classes with the other method only
+		if method == 'cycle-type':
+			expected = [(size, representative) for size, representative, elements in classes]
+			found = [(size, representative) for size, representative, elements in compute_conjugacy_classes_brute_force(n, num_cores, profiler)]
+		else:
+			with profiler.phase("cycle type computing") as record:
+				expected = [(size, representative) for size, representative, elements in compute_conjugacy_classes_cycle_type(n)]
+				record["items"] = len(expected)
+			found = [(size, representative) for size, representative, elements in classes]
+		if expected != found:
+			raise Exception(f"Inconsistent conjugacy classes. Got {found} by brute force, expected {expected} from cycle types.")
+		print(f"{len(found)} conjugacy classes verified by brute force.")
+
+	# Output sinks, data.json being the legacy one, permutations being packed by rank
+	sinks = []
+	if output_path is not None:
+		width = max(1, ((math.factorial(n) - 1).bit_length() + 7) >> 3)
+		sinks += [open_sink(output_path, output_format, width, compute_orbit_size_width(n), convert_string_to_rank)]
+	if json_data_output:
+		sinks += [LegacyJsonSink('data.json', make_legacy_record)]
 
 	# Printing orbits
-	print(f"Set of conjugacy classes")
-	for i, orbit in enumerate(orbits):
-		orbit_size=len(orbit)
-		representative = orbit[0]
-		if verbose:
-			if orbit_size>1:
-				elements = [f"{orbit[k]}" for k in range(len(orbit))]
-				print(f"index: {i+1}, {len(orbit)} elements: {elements}")
+	with profiler.phase("printing") as record, Sinks(sinks) as sink:
+		if not quiet:
+			print(f"Set of conjugacy classes")
+		for i, (orbit_size, representative, orbit) in enumerate(classes):
+			representative = ",".join(map(str, representative))
+			elements = None
+			if verbose:
+				elements = [convert_rank_to_string(orbit[k], n) for k in range(len(orbit))]
+			if quiet:
+				pass
+			elif verbose:
+				if orbit_size>1:
+					print(f"index: {i+1}, {len(orbit)} elements: {elements}")
+				else:
+					print(f"index: {i+1}, 1 representative: {representative}")
 			else:
-				print(f"index: {i+1}, 1 representative: {representative}")
-		else:
-			print(f"index: {i+1}, representative: {representative}")
+				print(f"index: {i+1}, representative: {representative}")
 
-		if json_data_output:
-			data += [{"index": i, "size": orbit_size, "representative": representative}]
+			sink.write(i, representative, orbit_size, elements)
 
-	if json_data_output:
-		# Specify the filename
-		filename = 'data.json'
+			record["items"] += 1
 
-		# Write the dictionary to a JSON file
-		with open(filename, 'w') as file:
-			json.dump(data, file, indent=4)  # indent=4 for pretty printing
+	if quiet:
+		print(f"Number of conjugacy classes: {record['items']}")
 
-	print_footer()
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
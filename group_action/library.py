@@ -1,21 +1,86 @@
 # built-in modules
 import argparse
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from collections.abc import Sequence
 import contextlib
+import functools
+from functools import lru_cache
 import itertools
 import json
 import math
+import os
+import resource
 import sys
+import tempfile
+import time
 
-# extra modules
-import joblib
-from joblib import Parallel, delayed
-from tqdm import tqdm
-
-sys.set_int_max_str_digits(8192)
+# extra modules, numpy, joblib and tqdm being imported on first use by the functions needing them
 
 from group_action import __version__
 
+# Problems with fewer items than this run in the calling process, without any worker pool nor progress bar
+SEQUENTIAL_THRESHOLD = 1 << 16
+
+def import_joblib():
+	"""
+	Import joblib on first use, as it dominates the startup time of commands that never start a worker pool
+	"""
+	import joblib
+	return joblib
+
+class NullProgressBar:
+	"""
+	Progress bar doing nothing, in place of tqdm for sequential runs
+	"""
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		pass
+
+	def update(self, n=1):
+		pass
+
+	def close(self):
+		pass
+
+def open_progress_bar(enabled, **kwargs):
+	"""
+	Open a tqdm progress bar with the given keyword arguments, importing tqdm on first use, or a NullProgressBar if not enabled
+	"""
+	if not enabled:
+		return NullProgressBar()
+	from tqdm import tqdm
+	return tqdm(**kwargs)
+
+def compute_effective_num_cores(num_cores):
+	"""
+	Compute the number of cores actually used for a number of cores given on the command line,
+	negative numbers counting down from the number of cores of the machine like joblib
+	"""
+	if num_cores < 0:
+		return max(1, os.cpu_count() + 1 + num_cores)
+	return num_cores
+
+def is_sequential(num_cores, size):
+	"""
+	Tell whether a problem of size items runs in the calling process, on a single core or below SEQUENTIAL_THRESHOLD
+	"""
+	return compute_effective_num_cores(num_cores) == 1 or size < SEQUENTIAL_THRESHOLD
+
+def parse_arguments(parser):
+	"""
+	Parse the arguments of a command, then print the header and the arguments summary unless --no-banner is given
+	The integer string conversion limit is raised beforehand, as signatures are parsed and printed as decimal integers
+	"""
+	sys.set_int_max_str_digits(8192)
+	args = parser.parse_args()
+	if not args.no_banner:
+		print_header()
+		print_arguments_summary(args, parser, __version__)
+	return args
+
 def print_arguments_summary(args, parser, version):
 	"""
 	Print execution summary
@@ -23,11 +88,10 @@ def print_arguments_summary(args, parser, version):
 	command_name = sys.argv[0]
 	print(f"Command: {command_name}\nVersion: {version}")
 	print("Arguments Summary:")
+	# help text of each argument, indexed once
+	help_texts = {action.dest: action.help for action in parser._actions}
 	for arg, value in vars(args).items():
-		# Find the corresponding action for this argument to get its help text
-		action = next(action for action in parser._actions if action.dest == arg)
-		help_text = action.help
-		print(f"  {help_text}: {value}")
+		print(f"  {help_texts[arg]}: {value}")
 	print(f"Type {command_name} --h to get more information about this command usage.")
 
 def print_header():
@@ -98,11 +162,56 @@ def generate_permutations(elements):
 	"""
 	return list(map(list, itertools.permutations(elements)))
 
+class LazySequence(Sequence):
+	"""
+	Read-only sequence computing its items on demand as item(index, *args)
+	Slicing gives a lazy sequence over the sub-range, so a (start, stop) descriptor is enough to rebuild a chunk anywhere
+	"""
+	def __init__(self, size, item, args=(), indices=None):
+		self.item = item
+		self.args = args
+		self.indices = range(size) if indices is None else indices
+
+	def __len__(self):
+		return len(self.indices)
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return LazySequence(0, self.item, self.args, self.indices[key])
+		return self.item(self.indices[key], *self.args)
+
+	def __iter__(self):
+		for index in self.indices:
+			yield self.item(index, *self.args)
+
+def unrank_permutation(rank, n):
+	"""
+	Compute the permutation of range(n) of given rank in lexicographic order (factorial number system)
+	"""
+	elements = list(range(n))
+	permutation = []
+	for k in range(n-1, -1, -1):
+		digit, rank = divmod(rank, math.factorial(k))
+		permutation += [elements.pop(digit)]
+	return permutation
+
+def rank_permutation(permutation):
+	"""
+	Compute the rank of a permutation of range(n) in lexicographic order from its Lehmer code, inverse of unrank_permutation
+	"""
+	n = len(permutation)
+	rank = 0
+	for i in range(n):
+		smaller = sum(1 for k in range(i+1, n) if permutation[k] < permutation[i])
+		rank += smaller * math.factorial(n-1-i)
+	return rank
+
 def generate_symmetric_group(n):
 	"""
 	Generate the symmetric group.
+	Permutations are computed on demand in lexicographic order, like itertools.permutations
 	"""
-	return generate_permutations(range(n))
+	return LazySequence(math.factorial(n), unrank_permutation, (n,))
 
 def generate_transpositions(n):
 	"""
@@ -110,6 +219,189 @@ def generate_transpositions(n):
 	"""
 	return list(itertools.combinations(range(n), 2))
 
+def generate_partitions(n, largest=None):
+	"""
+	Generate the integer partitions of n as non increasing lists of parts
+	The partitions of n are the cycle types of Sn
+	"""
+	if largest is None:
+		largest = n
+	if n == 0:
+		yield []
+		return
+	for part in range(min(n, largest), 0, -1):
+		for rest in generate_partitions(n - part, part):
+			yield [part] + rest
+
+def compute_cycle_type_size(cycle_type):
+	"""
+	Compute the size of the conjugacy class of Sn given by its cycle type
+	n!/prod(k^m_k.m_k!) where m_k is the number of cycles of length k
+	"""
+	n = sum(cycle_type)
+	denominator = 1
+	for length, multiplicity in Counter(cycle_type).items():
+		denominator *= length**multiplicity * math.factorial(multiplicity)
+	return math.factorial(n) // denominator
+
+def compute_cycle_type_representative(cycle_type):
+	"""
+	Compute the smallest permutation in lexicographic order having a given cycle type
+	Cycles are laid out by increasing length on consecutive elements
+	Ex: [2, 1, 1] becomes [0,1,3,2]
+	"""
+	permutation = []
+	for length in sorted(cycle_type):
+		start = len(permutation)
+		permutation += [start + (k+1) % length for k in range(length)]
+	return permutation
+
+def compute_cycle_type(permutation):
+	"""
+	Compute the cycle type of a permutation as the non increasing list of its cycle lengths
+	"""
+	seen = [False] * len(permutation)
+	cycle_type = []
+	for start in range(len(permutation)):
+		length = 0
+		k = start
+		while not seen[k]:
+			seen[k] = True
+			k = permutation[k]
+			length += 1
+		if length:
+			cycle_type += [length]
+	return sorted(cycle_type, reverse=True)
+
+def compute_divisors(m):
+	"""
+	Compute the sorted list of the divisors of a positive integer
+	"""
+	small = [d for d in range(1, math.isqrt(m) + 1) if m % d == 0]
+	return small + [m // d for d in reversed(small) if d * d != m]
+
+def compute_euler_phi(m):
+	"""
+	Compute Euler's totient of a positive integer
+	"""
+	result = m
+	p = 2
+	while p * p <= m:
+		if m % p == 0:
+			while m % p == 0:
+				m //= p
+			result -= result // p
+		p += 1
+	if m > 1:
+		result -= result // m
+	return result
+
+def compute_moebius(m):
+	"""
+	Compute the Moebius function of a positive integer
+	"""
+	result = 1
+	p = 2
+	while p * p <= m:
+		if m % p == 0:
+			m //= p
+			if m % p == 0:
+				return 0
+			result = -result
+		p += 1
+	if m > 1:
+		result = -result
+	return result
+
+# results of functions of cycle types by function name, then by comma-joined cycle type, see memoize_by_cycle_type
+cycle_type_cache = {}
+
+# cache_info of memoize_by_cycle_type, hits counting the results found in the LRU cache or in cycle_type_cache,
+# store_hits the latter only, and misses the results actually computed
+CycleTypeCacheInfo = namedtuple("CycleTypeCacheInfo", ["hits", "misses", "maxsize", "currsize", "store_hits"])
+
+def memoize_by_cycle_type(encode=None, decode=None):
+	"""
+	Decorator memoizing a function of a cycle type, whatever the order of the cycle lengths
+	Results are kept in an LRU cache and in cycle_type_cache, which is shared across functions and applications
+	and can be persisted with save_cycle_type_cache and load_cycle_type_cache.
+	encode and decode convert a result to and from JSON when it is not JSON serializable as is.
+	cache_info counts the results found in cycle_type_cache, for instance loaded from a previous invocation, as hits.
+	"""
+	def decorator(function):
+		store = cycle_type_cache.setdefault(function.__name__, {})
+		statistics = {"store_hits": 0}
+
+		@lru_cache(maxsize=4096)
+		def cached(key):
+			if key in store:
+				statistics["store_hits"] += 1
+				return decode(store[key]) if decode else store[key]
+			result = function([int(length) for length in key.split(",") if length])
+			store[key] = encode(result) if encode else result
+			return result
+
+		@functools.wraps(function)
+		def wrapper(cycle_type):
+			return cached(",".join(map(str, sorted(cycle_type, reverse=True))))
+
+		def cache_info():
+			info = cached.cache_info()
+			store_hits = statistics["store_hits"]
+			return CycleTypeCacheInfo(info.hits + store_hits, info.misses - store_hits, info.maxsize, info.currsize, store_hits)
+
+		def cache_clear():
+			cached.cache_clear()
+			statistics["store_hits"] = 0
+
+		wrapper.cache_info = cache_info
+		wrapper.cache_clear = cache_clear
+		return wrapper
+	return decorator
+
+def load_cycle_type_cache(path):
+	"""
+	Load results of functions of cycle types saved by save_cycle_type_cache, if the file exists
+	"""
+	if not os.path.exists(path):
+		return
+	with open(path, 'r') as file:
+		data = json.load(file)
+	if data.get("version") != __version__:
+		return
+	for name, results in data["functions"].items():
+		cycle_type_cache.setdefault(name, {}).update(results)
+
+def save_cycle_type_cache(path):
+	"""
+	Save results of functions of cycle types
+	The file is written aside and renamed so that concurrent invocations never read a partial cache
+	"""
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+	try:
+		with os.fdopen(descriptor, 'w') as file:
+			json.dump({"version": __version__, "functions": cycle_type_cache}, file)
+		os.chmod(temporary_path, 0o644)
+		os.replace(temporary_path, path)
+	except BaseException:
+		os.remove(temporary_path)
+		raise
+
+@memoize_by_cycle_type()
+def cycles_on_cube(cycle_type):
+	"""
+	Compute the number of cycles of a permutation of Sn acting on B^n from its cycle type only
+	By Burnside's lemma applied to the cyclic group <s> of order L=lcm(l_1..l_k),
+	the count is 1/L sum_{d|L} phi(L/d).2^(sum_i gcd(l_i, d))
+	"""
+	order = math.lcm(*cycle_type)
+	total = 0
+	for d in compute_divisors(order):
+		total += compute_euler_phi(order // d) << sum(math.gcd(length, d) for length in cycle_type)
+	return total // order
+
 def convert_transposition_to_permutation(transposition, n):
 	"""
 	Convert 2-cycle to permutation
@@ -166,18 +458,193 @@ def action(permutation, f):
 	
 	return g
 
+def compute_permutation_table(permutation):
+	"""
+	Compute the index map of the natural action of a permutation on B^n
+	Position x of the permuted signature reads position table[x] of the original signature
+	"""
+	n=len(permutation)
+	inverse = compute_permutation_inverse(permutation)
+	size=1<<n
+	table = []
+	for x in range(size):
+		# converting x into bits
+		bits = convert_int_to_bits(x, n)
+		# permuting and converting back to an int
+		table += [convert_bits_to_int(apply_permutation(inverse, bits))]
+	return table
+
+@lru_cache(maxsize=1024)
+def compute_transposition_table(transposition, n):
+	"""
+	Compute the permutation table of a transposition of Sn, cached as it is shared by many signatures
+	"""
+	return compute_permutation_table(convert_transposition_to_permutation(transposition, n))
+
+def generate_transposition_tables(n):
+	"""
+	Compute the permutation tables of the transpositions of Sn
+	"""
+	return [compute_transposition_table(transposition, n) for transposition in generate_transpositions(n)]
+
+def apply_permutation_table(table, signature):
+	"""
+	Compute the signature of the function permuted according to a precomputed permutation table
+	Same result as compute_signature(action(permutation, f), n) without any closure
+	"""
+	bits = convert_int_to_bits(signature, len(table))
+	return convert_bits_to_int([bits[position] for position in table])
+
+@lru_cache(maxsize=1024)
+def compute_delta_swap_mask(i, j, n):
+	"""
+	Compute the mask of the truth-table positions where variable i is 1 and variable j is 0, assert i<j
+	Their partners where variable i is 0 and variable j is 1 lie 2^j-2^i positions higher
+	"""
+	size = 1<<n
+	return convert_bits_to_int([((x >> i) & 1) & (~(x >> j) & 1) for x in range(size)])
+
+def swap_variables(signature, i, j, n):
+	"""
+	Apply the transposition (i j) to the variables of a signature with a single delta swap on the integer itself
+	Same result as apply_permutation_table with the table of the transposition
+	"""
+	if i == j:
+		return signature
+	if i > j:
+		i, j = j, i
+	shift = (1<<j) - (1<<i)
+	delta = ((signature >> shift) ^ signature) & compute_delta_swap_mask(i, j, n)
+	return signature ^ delta ^ (delta << shift)
+
+def decompose_permutation(permutation):
+	"""
+	Decompose a permutation into at most n-1 transpositions, listed in the order swap_variables applies them
+	"""
+	current = list(permutation)
+	transpositions = []
+	for i in range(len(current)):
+		while current[i] != i:
+			j = current[i]
+			current[i], current[j] = current[j], current[i]
+			transpositions += [(i, j)]
+	return transpositions[::-1]
+
+def permute_variables(permutation, signature):
+	"""
+	Apply a permutation to the variables of a signature with O(n) delta swaps
+	Same result as apply_permutation_table with the table of the permutation
+	"""
+	n = len(permutation)
+	for i, j in decompose_permutation(permutation):
+		signature = swap_variables(signature, i, j, n)
+	return signature
+
+def convert_signatures_to_bit_matrix(start, stop, n):
+	"""
+	Compute the bit matrix of a contiguous range of signatures
+	Rows are the signatures start to stop-1, columns are the 2^n positions of their truth tables
+	assert n<=6 so that a signature fits into 64 bits
+	"""
+	if n>6:
+		raise Exception(f"Bit matrices are limited to 6 inputs, got {n}.")
+	import numpy as np
+	signatures = np.arange(start, stop, dtype=np.uint64)
+	positions = np.arange(1<<n, dtype=np.uint64)
+	return ((signatures[:, None] >> positions) & np.uint64(1)).astype(np.uint8)
+
+def convert_bit_matrix_to_signatures(matrix):
+	"""
+	Pack each row of a bit matrix back into a signature
+	"""
+	import numpy as np
+	powers = np.left_shift(np.uint64(1), np.arange(matrix.shape[1], dtype=np.uint64))
+	return matrix.astype(np.uint64) @ powers
+
+def apply_permutation_table_to_range(table, start, stop, n):
+	"""
+	Compute the permuted signatures of the signatures start to stop-1 with a single gather
+	"""
+	matrix = convert_signatures_to_bit_matrix(start, stop, n)
+	return convert_bit_matrix_to_signatures(matrix[:, table])
+
+@lru_cache(maxsize=64)
+def compute_variable_masks(n):
+	"""
+	Compute for each variable the signature of the projection on it, namely the mask of the truth-table positions where it is 1
+	"""
+	size = 1<<n
+	return [convert_bits_to_int([(x >> i) & 1 for x in range(size)]) for i in range(n)]
+
+@lru_cache(maxsize=64)
+def compute_weight_masks(n):
+	"""
+	Compute for each Hamming weight k=0..n the mask of the truth-table positions of weight k
+	Positions of weight k in n variables are those of weight k in n-1 variables, and those of weight k-1 shifted by 2^(n-1)
+	"""
+	masks = [1]
+	for m in range(n):
+		shift = 1 << m
+		masks = [(masks[k] if k < len(masks) else 0) | ((masks[k-1] << shift) if k > 0 else 0) for k in range(m + 2)]
+	return masks
+
+def generate_adjacent_transpositions(n):
+	"""
+	Generate the adjacent transpositions (i i+1), the smallest set of transpositions generating Sn
+	"""
+	return [(i, i+1) for i in range(n-1)]
+
+def compute_orbit(signature, n, max_size=None):
+	"""
+	Compute the orbit of a signature under Sn as its closure under the adjacent transpositions
+	"""
+	transpositions = generate_adjacent_transpositions(n)
+	visited = {signature}
+	orbit = [signature]
+	# expanding the orbit until closure, the list growing while iterated
+	for element in orbit:
+		for i, j in transpositions:
+			new_signature = swap_variables(element, i, j, n)
+			if new_signature not in visited:
+				visited.add(new_signature)
+				orbit.append(new_signature)
+		if max_size is not None and len(orbit) > max_size:
+			raise Exception(f"Orbit of {signature} exceeds {max_size} elements.")
+	return orbit
+
+def generate_canonical_orbits(n, generators=None):
+	"""
+	Generate the orbits of the action of Sn on n-input Boolean functions without any graph
+	Signatures are walked in increasing order and a bitset skips the ones already seen
+	Each orbit is yielded sorted as soon as it is complete, so its first element is its minimal signature
+	generators are functions of a signature generating the group acting, the adjacent transpositions of Sn by default
+	"""
+	if generators is None:
+		generators = [lambda signature, i=i, j=j: swap_variables(signature, i, j, n) for i, j in generate_adjacent_transpositions(n)]
+	size = 2**(2**n)
+	visited = bytearray((size + 7) >> 3)
+	for signature in range(size):
+		if (visited[signature >> 3] >> (signature & 7)) & 1:
+			continue
+		visited[signature >> 3] |= 1 << (signature & 7)
+		orbit = [signature]
+		# expanding the orbit until closure, the list growing while iterated
+		for element in orbit:
+			for generator in generators:
+				new_signature = generator(element)
+				if not (visited[new_signature >> 3] >> (new_signature & 7)) & 1:
+					visited[new_signature >> 3] |= 1 << (new_signature & 7)
+					orbit.append(new_signature)
+		orbit.sort()
+		yield orbit
+
 def generate_functions(n):
 	"""
 	Generate Boolean functions according to number of variables
+	Functions are created on demand, index i being the function of signature i
 	"""
 	size=2**(2**n)
-	functions=[]
-	for i in range(size):
-		def f(x, i=i):
-			return (i >> x) & 1
-		functions += [f]
-	
-	return functions
+	return LazySequence(size, generate_function, (n,))
 
 def compute_signature(f,n):
 	"""
@@ -272,6 +739,8 @@ def tqdm_joblib(tqdm_object):
 	"""
 	Context manager to patch joblib to report into tqdm progress bar given as argument
 	"""
+	joblib = import_joblib()
+
 	class TqdmBatchCompletionCallback(joblib.parallel.BatchCompletionCallBack):
 		def __call__(self, *args, **kwargs):
 			tqdm_object.update(n=self.batch_size)
@@ -300,24 +769,350 @@ def dfs(node, graph, visited, component):
 def find_connected_components(vertices, edges):
 	"""
 	Find connected components
+	Edges are merged into a DisjointSet as they are iterated, so that they may be generated lazily without any
+	adjacency list. Components are ordered by their first vertex, their vertices following the order of vertices.
 	"""
-	graph = defaultdict(list)
-	for u, v in edges:
-		graph[u].append(v)
-		graph[v].append(u)  # Since the graph is undirected
-
-	visited = set()
-	components = []
-	for vertex in vertices:
-		if vertex not in visited:
-			component = []
-			dfs(vertex, graph, visited, component)
-			components.append(component)
-	
-	return components
+	disjoint_set = DisjointSet(vertices)
+	disjoint_set.union_edges(edges)
+	return disjoint_set.components()
+
+class DisjointSet:
+	"""
+	Disjoint-set forest with path compression and union by rank
+	Array-backed when vertices are the dense integers 0 to size-1, dictionary-backed otherwise
+	Edges are merged as they arrive so that the edge list is never materialized
+	"""
+	def __init__(self, vertices):
+		self.vertices = vertices
+		if isinstance(vertices, range) and vertices.start == 0 and vertices.step == 1:
+			self.parent = array('q', vertices)
+			self.rank = bytearray(len(vertices))
+		else:
+			self.parent = {vertex: vertex for vertex in vertices}
+			self.rank = {vertex: 0 for vertex in vertices}
+
+	def find(self, vertex):
+		"""
+		Find the root of the vertex and compress the path to it
+		"""
+		parent = self.parent
+		root = vertex
+		while parent[root] != root:
+			root = parent[root]
+		while parent[vertex] != root:
+			parent[vertex], vertex = root, parent[vertex]
+		return root
+
+	def union(self, u, v):
+		"""
+		Merge the sets of u and v, attaching the lower rank root under the higher rank one
+		"""
+		u = self.find(u)
+		v = self.find(v)
+		if u == v:
+			return
+		rank = self.rank
+		if rank[u] < rank[v]:
+			u, v = v, u
+		self.parent[v] = u
+		if rank[u] == rank[v]:
+			rank[u] += 1
+
+	def union_edges(self, edges):
+		"""
+		Merge the sets of both ends of each edge
+		"""
+		for u, v in edges:
+			self.union(u, v)
+
+	def components(self):
+		"""
+		Compute the connected components ordered by their first vertex
+		"""
+		components = {}
+		for vertex in self.vertices:
+			root = self.find(vertex)
+			if root in components:
+				components[root].append(vertex)
+			else:
+				components[root] = [vertex]
+		return list(components.values())
+
+class SharedArray:
+	"""
+	NumPy array backed by a temporary memory-mapped .npy file, in /dev/shm when available
+	Workers attach to it through its path with attach_shared_array and write their results in place,
+	so that nothing is pickled back to the parent, which reads the array without any copy
+	"""
+	def __init__(self, shape, dtype):
+		import numpy as np
+		directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+		descriptor, self.path = tempfile.mkstemp(dir=directory, suffix=".npy")
+		os.close(descriptor)
+		self.array = np.lib.format.open_memmap(self.path, mode="w+", dtype=dtype, shape=shape)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		del self.array
+		os.remove(self.path)
+
+def attach_shared_array(path):
+	"""
+	Attach to the array of a SharedArray from any process
+	"""
+	import numpy as np
+	return np.load(path, mmap_mode="r+")
+
+def find_components_from_images(images):
+	"""
+	Find connected components of the graph with edges s - images[g][s] for each generator g, assert generators are involutions
+	Each vertex is labelled by the smallest vertex of its component, pulling the minimal label of its neighbours and
+	jumping to the label of its label until stable. Components are ordered by their smallest vertex, like DisjointSet.
+	"""
+	import numpy as np
+	size = images.shape[1]
+	labels = np.arange(size, dtype=np.int64)
+	while True:
+		new_labels = labels.copy()
+		for image in images:
+			np.minimum(new_labels, labels[image], out=new_labels)
+		new_labels = new_labels[new_labels]
+		if np.array_equal(new_labels, labels):
+			break
+		labels = new_labels
+
+	order = np.argsort(labels, kind="stable")
+	boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+	return [component.tolist() for component in np.split(order, boundaries)]
 
 def chunk_list(data, chunk_size):
 	"""
 	Compute a list of chunks from data
 	"""
 	return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+def chunk_range(size, chunk_size):
+	"""
+	Compute a list of (start, stop) ranges covering range(size)
+	"""
+	return [(i, min(i + chunk_size, size)) for i in range(0, size, chunk_size)]
+
+def timed_task(task, generator_index, start, stop, args, caches=()):
+	"""
+	Run a task on a range of a generator and measure it inside the worker: its duration, the (hits, misses) of
+	each of the cached functions given during the task, and the peak RSS of the worker
+	"""
+	before = [function.cache_info() for function in caches]
+	begin = time.perf_counter()
+	result = task(generator_index, start, stop, *args)
+	duration = time.perf_counter() - begin
+	cache_deltas = [(function.cache_info().hits - info.hits, function.cache_info().misses - info.misses) for function, info in zip(caches, before)]
+	return duration, stop - start, result, cache_deltas, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class Scheduler:
+	"""
+	Dispatch task(generator_index, start, stop, *args) jobs on one persistent joblib worker pool
+	Workers only receive integer descriptors and rebuild their inputs locally.
+	Jobs are sent by rounds, and the number of items per job is adapted after each round from the measured
+	throughput so that a job lasts about target_duration seconds.
+	The pool is only started by the first map that is not sequential, see is_sequential, other maps running the
+	jobs in the calling process without importing joblib.
+	caches maps names to cached functions whose hits and misses inside the workers are added up, as the calling
+	process only sees its own, like Profiler.caches.
+	"""
+	def __init__(self, num_cores, target_duration=0.2, initial_chunk_size=256, min_chunk_size=1, max_chunk_size=2**20, caches=None):
+		self.num_cores = compute_effective_num_cores(num_cores)
+		self.caches = caches if caches is not None else {}
+		self.target_duration = target_duration
+		self.initial_chunk_size = initial_chunk_size
+		self.min_chunk_size = min_chunk_size
+		self.max_chunk_size = max_chunk_size
+		self.parallel = None
+		# statistics over every map, for profiling
+		self.num_jobs = 0
+		self.num_items = 0
+		self.worker_time = 0
+		self.worker_caches = {name: [0, 0] for name in self.caches}
+		self.worker_peak_rss = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		if self.parallel is not None:
+			return self.parallel.__exit__(*exception)
+
+	def run(self, task, jobs, args, sequential):
+		"""
+		Run a round of jobs in the calling process if sequential, on the worker pool otherwise, yielding results as jobs complete
+		"""
+		if sequential:
+			return (timed_task(task, generator_index, start, stop, args) for generator_index, start, stop in jobs)
+		joblib = import_joblib()
+		if self.parallel is None:
+			self.parallel = joblib.Parallel(n_jobs=self.num_cores, return_as="generator_unordered")
+			self.parallel.__enter__()
+		caches = tuple(self.caches.values())
+		return self.parallel(joblib.delayed(timed_task)(task, generator_index, start, stop, args, caches) for generator_index, start, stop in jobs)
+
+	def map(self, task, num_generators, size, args=(), progress_bar=None):
+		"""
+		Run the task over every generator and every item of range(size), yielding results as jobs complete
+		"""
+		total = num_generators * size
+		sequential = is_sequential(self.num_cores, total)
+		position = 0
+		chunk_size = self.initial_chunk_size
+		jobs_per_round = 4 * self.num_cores
+		while position < total:
+			# jobs of the round, never crossing from a generator to the next one
+			jobs = []
+			while position < total and len(jobs) < jobs_per_round:
+				generator_index, start = divmod(position, size)
+				stop = min(start + chunk_size, size)
+				jobs += [(generator_index, start, stop)]
+				position += stop - start
+
+			elapsed = 0
+			count = 0
+			for duration, items, result, cache_deltas, peak_rss in self.run(task, jobs, args, sequential):
+				elapsed += duration
+				count += items
+				self.num_jobs += 1
+				self.num_items += items
+				self.worker_time += duration
+				# sequential jobs are seen by the caches and the RSS of the calling process already
+				if not sequential:
+					for name, (hits, misses) in zip(self.caches, cache_deltas):
+						self.worker_caches[name][0] += hits
+						self.worker_caches[name][1] += misses
+					self.worker_peak_rss = max(self.worker_peak_rss, peak_rss)
+				if progress_bar is not None:
+					progress_bar.update(items)
+				yield result
+
+			# adapting granularity to the measured throughput
+			if elapsed > 0:
+				chunk_size = int(self.target_duration * count / elapsed)
+			else:
+				chunk_size *= 4
+			chunk_size = min(self.max_chunk_size, max(self.min_chunk_size, chunk_size))
+
+class Profiler:
+	"""
+	Record wall time, CPU time, peak RSS, items processed and jobs of each phase of a command, and cache statistics
+	Phases are timed with the phase context manager, which yields a record whose items and jobs the caller fills in.
+	A disabled profiler records nothing, so commands are instrumented unconditionally.
+	Cache statistics and peak RSS of workers are those reported by a Scheduler, workers started otherwise being
+	flagged with record_untracked_workers so that their cache statistics are reported as unknown.
+	"""
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.phases = []
+		self.caches = {}
+		self.worker_caches = {}
+		self.worker_peak_rss = 0
+		self.untracked_workers = False
+		self.wall_start = time.perf_counter()
+
+	@contextlib.contextmanager
+	def phase(self, name):
+		record = {"phase": name, "items": 0, "jobs": 0}
+		if not self.enabled:
+			yield record
+			return
+		wall_start = time.perf_counter()
+		cpu_start = time.process_time()
+		try:
+			yield record
+		finally:
+			record["wall_s"] = time.perf_counter() - wall_start
+			record["cpu_s"] = time.process_time() - cpu_start
+			record["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+			self.phases.append(record)
+
+	def record_scheduler(self, record, scheduler):
+		"""
+		Fill in a phase record with the jobs, items, worker time and worker peak RSS of a Scheduler,
+		and add up the cache statistics of its workers
+		"""
+		record["jobs"] = scheduler.num_jobs
+		record["items"] = scheduler.num_items
+		record["worker_s"] = scheduler.worker_time
+		record["workers"] = scheduler.num_cores
+		record["worker_peak_rss_kib"] = scheduler.worker_peak_rss
+		self.worker_peak_rss = max(self.worker_peak_rss, scheduler.worker_peak_rss)
+		for name, (hits, misses) in scheduler.worker_caches.items():
+			worker_cache = self.worker_caches.setdefault(name, [0, 0])
+			worker_cache[0] += hits
+			worker_cache[1] += misses
+
+	def record_untracked_workers(self, record, num_cores):
+		"""
+		Flag a phase whose work ran in workers not started by a Scheduler, their cache statistics being unknown
+		"""
+		record["workers"] = num_cores
+		self.untracked_workers = True
+
+	def track_cache(self, name, function):
+		"""
+		Track the statistics of a function decorated with lru_cache, in the main process and in Scheduler workers
+		"""
+		self.caches[name] = function
+
+	def summary(self):
+		"""
+		Compute the machine-readable profile
+		"""
+		caches = {}
+		for name, function in self.caches.items():
+			info = function.cache_info()
+			if self.untracked_workers:
+				caches[name] = {"hits": None, "misses": None, "maxsize": info.maxsize, "currsize": info.currsize, "hit_rate": None}
+				continue
+			worker_hits, worker_misses = self.worker_caches.get(name, (0, 0))
+			hits = info.hits + worker_hits
+			misses = info.misses + worker_misses
+			calls = hits + misses
+			caches[name] = {"hits": hits, "misses": misses, "maxsize": info.maxsize, "currsize": info.currsize,
+				"hit_rate": hits / calls if calls else 0}
+			# results loaded from the persistent cycle type cache, see memoize_by_cycle_type
+			if hasattr(info, "store_hits"):
+				caches[name]["store_hits"] = info.store_hits
+		return {
+			"command": os.path.basename(sys.argv[0]),
+			"arguments": sys.argv[1:],
+			"version": __version__,
+			"wall_s": time.perf_counter() - self.wall_start,
+			"peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+			"worker_peak_rss_kib": self.worker_peak_rss,
+			"phases": self.phases,
+			"caches": caches,
+		}
+
+	def report(self, path):
+		"""
+		Print the profile as a table and write it as JSON, nothing if disabled
+		"""
+		if not self.enabled:
+			return
+		summary = self.summary()
+		print(f"Profile of {summary['command']}")
+		print(f"{'phase':32} {'wall (s)':>10} {'cpu (s)':>10} {'workers (s)':>12} {'peak RSS (KiB)':>15} {'items':>12} {'jobs':>8}")
+		for record in summary["phases"]:
+			print(f"{record['phase']:32} {record['wall_s']:10.3f} {record['cpu_s']:10.3f} {record.get('worker_s', 0):12.3f} {record['peak_rss_kib']:15} {record['items']:12} {record['jobs']:8}")
+		print(f"{'total':32} {summary['wall_s']:10.3f}")
+		if summary["worker_peak_rss_kib"]:
+			print(f"worker peak RSS: {summary['worker_peak_rss_kib']} KiB")
+		for name, cache in summary["caches"].items():
+			if cache["hit_rate"] is None:
+				print(f"cache {name}: n/a (computed in workers)")
+			else:
+				store_hits = f" ({cache['store_hits']} from the persistent cache)" if "store_hits" in cache else ""
+				print(f"cache {name}: {cache['hits']} hits{store_hits}, {cache['misses']} misses, hit rate {cache['hit_rate']:.1%}, {cache['currsize']}/{cache['maxsize']} entries")
+
+		with open(path, 'w') as file:
+			json.dump(summary, file, indent=4)
+		print(f"Profile written to {path}")
@@ -0,0 +1,163 @@
+from group_action import __version__, __num_of_cores__
+from group_action.library import *
+import numpy as np
+import os
+import tempfile
+
+# File layout: a header, then one orbit index per signature, then one representative and one size per orbit
+ORBIT_TABLE_MAGIC = b"GAORBITS"
+ORBIT_TABLE_VERSION = 1
+ORBIT_TABLE_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("n", "<u4"), ("signatures", "<u8"), ("orbits", "<u8")])
+
+def get_orbit_table_path(n, directory=None):
+	"""
+	Compute the path of the orbit table of n-input Boolean functions
+	Default directory is $XDG_CACHE_HOME/group_action or ~/.cache/group_action
+	"""
+	if directory is None:
+		directory = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "group_action")
+	return os.path.join(directory, f"orbits_{n}.bin")
+
+def build_orbit_table(n, path):
+	"""
+	Compute the orbits of n-input Boolean functions and write them as an orbit table
+	The file is written aside and renamed so that readers never see a partial table
+	"""
+	size = 2**(2**n)
+	orbit_ids = np.zeros(size, dtype="<u4")
+	representatives = []
+	sizes = []
+	for i, orbit in enumerate(generate_canonical_orbits(n)):
+		orbit_ids[orbit] = i
+		representatives += [orbit[0]]
+		sizes += [len(orbit)]
+
+	header = np.array([(ORBIT_TABLE_MAGIC, ORBIT_TABLE_VERSION, n, size, len(sizes))], dtype=ORBIT_TABLE_HEADER)
+
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+	try:
+		with os.fdopen(descriptor, "wb") as file:
+			file.write(header.tobytes())
+			file.write(orbit_ids.tobytes())
+			file.write(np.array(representatives, dtype="<u8").tobytes())
+			file.write(np.array(sizes, dtype="<u8").tobytes())
+		os.chmod(temporary_path, 0o644)
+		os.replace(temporary_path, path)
+	except BaseException:
+		os.remove(temporary_path)
+		raise
+
+class OrbitTable:
+	"""
+	Read-only memory-mapped orbit table answering orbit queries in O(1)
+	"""
+	def __init__(self, path):
+		header = np.fromfile(path, dtype=ORBIT_TABLE_HEADER, count=1)
+		if len(header) != 1 or header["magic"][0] != ORBIT_TABLE_MAGIC or header["version"][0] != ORBIT_TABLE_VERSION:
+			raise Exception(f"{path} is not an orbit table.")
+		self.path = path
+		self.n = int(header["n"][0])
+		self.size = int(header["signatures"][0])
+		self.num_orbits = int(header["orbits"][0])
+		offset = ORBIT_TABLE_HEADER.itemsize
+		self.orbit_ids = np.memmap(path, dtype="<u4", mode="r", offset=offset, shape=(self.size,))
+		offset += self.orbit_ids.nbytes
+		self.representatives = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(self.num_orbits,))
+		offset += self.representatives.nbytes
+		self.sizes = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(self.num_orbits,))
+
+	def __len__(self):
+		return self.num_orbits
+
+	def orbit_id(self, signature):
+		"""
+		Get the index of the orbit of a signature
+		"""
+		if not 0 <= signature < self.size:
+			raise Exception(f"Signature {signature} out of range for {self.n} inputs.")
+		return int(self.orbit_ids[signature])
+
+	def representative(self, signature):
+		"""
+		Get the minimal signature of the orbit of a signature
+		"""
+		return int(self.representatives[self.orbit_id(signature)])
+
+	def orbit_size(self, signature):
+		"""
+		Get the size of the orbit of a signature
+		"""
+		return int(self.sizes[self.orbit_id(signature)])
+
+	def lookup(self, signature):
+		"""
+		Get the index, representative and size of the orbit of a signature
+		"""
+		i = self.orbit_id(signature)
+		return i, int(self.representatives[i]), int(self.sizes[i])
+
+def open_orbit_table(n, directory=None, build=True):
+	"""
+	Open the orbit table of n-input Boolean functions, building it first if it does not exist yet
+	"""
+	path = get_orbit_table_path(n, directory)
+	if not os.path.exists(path):
+		if not build:
+			raise Exception(f"No orbit table for {n} inputs at {path}.")
+		build_orbit_table(n, path)
+	return OrbitTable(path)
+
+def main():
+	# Create the parser
+	parser = argparse.ArgumentParser(description='Look up the orbit of n-input, 1-output Boolean functions specified via their signatures as LE integers in a persistent orbit table, building the table once per n.')
+
+	# Add the arguments
+	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+	parser.add_argument('--s', type=int, nargs='+', default=[12], help='Signatures')
+	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
+	parser.add_argument('--path', type=str, default=None, help='Orbit table directory')
+	parser.add_argument('--rebuild', action='store_true', help='Rebuild the orbit table')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
+
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
+
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+
+	# signatures
+	signatures = args.s
+
+	# number of inputs
+	n=args.n
+
+	# orbit table directory
+	directory = args.path
+
+	if args.rebuild:
+		with profiler.phase("orbit table building") as record:
+			build_orbit_table(n, get_orbit_table_path(n, directory))
+			record["items"] = 2**(2**n)
+
+	# Opening orbit table, building it if needed
+	with profiler.phase("orbit table opening") as record:
+		table = open_orbit_table(n, directory)
+		record["items"] = len(table)
+
+	# Printing orbit of each signature
+	with profiler.phase("lookup") as record:
+		print(f"{len(table)} orbits under the action of S{n} on 2^2^{n} read from {table.path}")
+		for signature in signatures:
+			index, representative, orbit_size = table.lookup(signature)
+			print(f"signature: {signature}, index: {index}, representative: {representative}, size: {orbit_size}")
+		record["items"] = len(signatures)
+
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
+
+if __name__ == '__main__':
+	main()
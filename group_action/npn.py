@@ -0,0 +1,288 @@
+from group_action import __version__, __num_of_cores__
+from group_action.library import *
+from group_action.canon import canonical_signature, read_signatures
+from group_action.sinks import *
+
+"""
+NPN equivalence: two functions are equivalent when one is obtained from the other by Negating some inputs,
+Permuting the inputs and Negating the output. The group acting is the hyperoctahedral group Bn of the signed
+permutations of the inputs, times Z2 for the output.
+"""
+
+@lru_cache(maxsize=64)
+def compute_negation_masks(n):
+	"""
+	Compute for each variable the mask of the truth-table positions where it is 0
+	Their partners where the variable is 1 lie 2^i positions higher
+	"""
+	full = (1 << (1 << n)) - 1
+	return [full ^ mask for mask in compute_variable_masks(n)]
+
+def negate_variable(signature, i, n):
+	"""
+	Negate variable i of a signature with a single delta swap, exchanging the blocks where it is 0 and 1
+	"""
+	shift = 1 << i
+	delta = ((signature >> shift) ^ signature) & compute_negation_masks(n)[i]
+	return signature ^ delta ^ (delta << shift)
+
+def negate_variables(signature, negation, n):
+	"""
+	Negate the variables given by the bits of negation
+	"""
+	for i in range(n):
+		if (negation >> i) & 1:
+			signature = negate_variable(signature, i, n)
+	return signature
+
+def negate_output(signature, n):
+	"""
+	Negate the output of a signature
+	"""
+	return signature ^ ((1 << (1 << n)) - 1)
+
+def apply_npn_transform(signature, negation, permutation, output_negation, n):
+	"""
+	Apply an NPN transform to a signature: negate the variables given by the bits of negation,
+	then permute the variables, then negate the output if output_negation is set
+	"""
+	signature = permute_variables(permutation, negate_variables(signature, negation, n))
+	if output_negation:
+		signature = negate_output(signature, n)
+	return signature
+
+def npn_canonical_signature(signature, n):
+	"""
+	Compute the NPN canonical signature of a Boolean function, namely the minimal signature of its NPN class
+
+	Negations are walked in Gray code order so that each step negates a single variable, and each negated signature
+	is brought to its minimal signature under Sn. Permutations fix the position of the all-ones input vector, which is
+	the most significant bit, so only the output polarity making it 0 can lead to the minimum.
+	"""
+	full_position = (1 << n) - 1
+	seen = set()
+	best = None
+	current = signature
+	for k in range(1 << n):
+		if k:
+			current = negate_variable(current, (k & -k).bit_length() - 1, n)
+		candidate = negate_output(current, n) if (current >> full_position) & 1 else current
+		if candidate in seen:
+			continue
+		seen.add(candidate)
+		canonical = canonical_signature(candidate, n)
+		if best is None or canonical < best:
+			best = canonical
+	return best
+
+def generate_npn_generators(n):
+	"""
+	Generate the NPN generators as functions of a signature: the adjacent transpositions, the negation of x0
+	and the negation of the output
+	"""
+	generators = [lambda signature, i=i, j=j: swap_variables(signature, i, j, n) for i, j in generate_adjacent_transpositions(n)]
+	if n > 0:
+		generators += [lambda signature: negate_variable(signature, 0, n)]
+	generators += [lambda signature: negate_output(signature, n)]
+	return generators
+
+def generate_npn_orbits(n):
+	"""
+	Generate the NPN classes of n-input Boolean functions without any graph, by the bitset walk of
+	generate_canonical_orbits under the NPN generators
+	Each class is yielded sorted as soon as it is complete, so its first element is its minimal signature
+	"""
+	return generate_canonical_orbits(n, generate_npn_generators(n))
+
+def generate_signed_cycle_types(n):
+	"""
+	Generate the signed cycle types of Bn, namely its conjugacy classes, as (positive, negative) pairs of partitions
+	A cycle is negative when an odd number of its variables are negated along it
+	"""
+	for m in range(n, -1, -1):
+		for positive in generate_partitions(m):
+			for negative in generate_partitions(n - m):
+				yield positive, negative
+
+def compute_signed_cycle_type_size(positive, negative):
+	"""
+	Compute the number of signed permutations of a signed cycle type, 2^n.n!/prod (2l)^a_l.a_l!.(2l)^b_l.b_l!
+	"""
+	n = sum(positive) + sum(negative)
+	denominator = 1
+	for cycle_type in (positive, negative):
+		for length, multiplicity in Counter(cycle_type).items():
+			denominator *= (2 * length)**multiplicity * math.factorial(multiplicity)
+	return 2**n * math.factorial(n) // denominator
+
+@lru_cache(maxsize=4096)
+def compute_signed_cycles_by_length(positive, negative):
+	"""
+	Count the cycles of a signed permutation acting on B^n according to their length
+	Returns a dictionary mapping a length to a number of cycles
+
+	s^d fixes 2^gcd(l,d) points of a positive cycle of length l. A negative cycle of length l behaves like a rotation
+	of 2l bits whose halves are complementary, so s^d fixes 2^(gcd(2l,d)/2) of its points if gcd(2l,d) does not divide l,
+	none otherwise. Points of exact period d are counted by Moebius inversion.
+	"""
+	order = math.lcm(*positive, *[2 * length for length in negative])
+	divisors = compute_divisors(order)
+	fixed = {}
+	for d in divisors:
+		exponent = sum(math.gcd(length, d) for length in positive)
+		for length in negative:
+			g = math.gcd(2 * length, d)
+			if length % g == 0:
+				exponent = None
+				break
+			exponent += g // 2
+		fixed[d] = 0 if exponent is None else 1 << exponent
+	cycles = {}
+	for d in divisors:
+		points = sum(compute_moebius(d // e) * fixed[e] for e in divisors if d % e == 0)
+		if points:
+			cycles[d] = points // d
+	return cycles
+
+def compute_npn_burnside_terms(n):
+	"""
+	Compute the terms of Burnside's formula for Bn x Z2 as (class size, fixed functions) pairs, one per signed cycle type
+	A signed permutation fixes 2^c functions for c cycles on B^n. Combined with the output negation, it fixes a function
+	only if all of its cycles have an even length, which is then 2^c functions too.
+	"""
+	terms = []
+	for positive, negative in generate_signed_cycle_types(n):
+		cycles = compute_signed_cycles_by_length(tuple(positive), tuple(negative))
+		count = sum(cycles.values())
+		fixed = 1 << count
+		if all(length % 2 == 0 for length in cycles):
+			fixed += 1 << count
+		terms += [(compute_signed_cycle_type_size(positive, negative), fixed)]
+	return terms
+
+def count_npn_classes(n):
+	"""
+	Count the NPN classes of n-input Boolean functions with Burnside's lemma over Bn x Z2, of order 2^(n+1).n!
+	"""
+	return sum(size * fixed for size, fixed in compute_npn_burnside_terms(n)) // (2**(n + 1) * math.factorial(n))
+
+def main():
+	# Create the parser
+	parser = argparse.ArgumentParser(description='Computation of the NPN classes of n-input, 1-output Boolean functions, namely their orbits under input negations, input permutations and output negation, or of the NPN canonical signature of functions specified via their signatures as LE integers.')
+
+	# Add the arguments
+	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
+	parser.add_argument('--s', type=int, nargs='+', default=[], help='Signatures to canonicalize')
+	parser.add_argument('--f', type=str, default=None, help='File of signatures to canonicalize, - for standard input')
+	parser.add_argument('--count-only', action='store_true', help="Only count the NPN classes with Burnside's lemma")
+	parser.add_argument('--v', action='store_true', help='Output every element of each orbit')
+	parser.add_argument('--j', action='store_true', help='Output data.json file')
+	parser.add_argument('--output', type=str, default=None, help='NPN class output file, written as classes are computed')
+	parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=None, help='NPN class output file format, guessed from its extension by default')
+	parser.add_argument('--quiet', action='store_true', help='Only print the number of NPN classes')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
+
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
+
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+	profiler.track_cache("compute_signed_cycles_by_length", compute_signed_cycles_by_length)
+	profiler.track_cache("compute_delta_swap_mask", compute_delta_swap_mask)
+
+	"""
+	Initialize Default value
+	"""
+
+	# number of inputs
+	n=args.n
+
+	# signatures to canonicalize
+	signatures = args.s
+	if args.f is not None:
+		signatures = signatures + read_signatures(args.f)
+
+	# counting only
+	count_only = args.count_only
+
+	# verbose output
+	verbose = args.v
+
+	# json data output
+	json_data_output = args.j
+
+	# NPN class output file and format
+	output_path = args.output
+	output_format = args.output_format
+
+	# console output of the number of NPN classes only
+	quiet = args.quiet
+
+	# the number of classes is about 2^2^n/(2^(n+1).n!), far beyond the default integer string conversion limit
+	sys.set_int_max_str_digits(0)
+
+	if signatures:
+		# Printing canonical signatures
+		with profiler.phase("canonicalization") as record:
+			print(f"NPN canonical signatures on 2^2^{n}")
+			for i, signature in enumerate(signatures):
+				if not 0 <= signature < 2**(2**n):
+					raise Exception(f"Signature {signature} out of range for {n} inputs.")
+				print(f"index: {i}, signature: {signature}, canonical: {npn_canonical_signature(signature, n)}")
+			record["items"] = len(signatures)
+		profiler.report(args.profile)
+		if not args.no_banner:
+			print_footer()
+		return
+
+	# Counting NPN classes
+	with profiler.phase("burnside counting") as record:
+		expect = count_npn_classes(n)
+		record["items"] = compute_signed_cycles_by_length.cache_info().currsize
+	print(f"Number of NPN classes: {expect}")
+	if count_only:
+		profiler.report(args.profile)
+		if not args.no_banner:
+			print_footer()
+		return
+
+	# Output sinks, data.json being the legacy one
+	sinks = []
+	if output_path is not None:
+		size_width = max(1, ((2**(n + 1) * math.factorial(n)).bit_length() + 7) >> 3)
+		sinks += [open_sink(output_path, output_format, compute_signature_width(n), size_width)]
+	if json_data_output:
+		sinks += [LegacyJsonSink('data.json', make_legacy_orbit_record)]
+
+	# Printing orbits
+	with profiler.phase("orbit computing and printing") as record, Sinks(sinks) as sink:
+		if not quiet:
+			print(f"Set of {n}-input Boolean functions NPN classes")
+		count = 0
+		for i, orbit in enumerate(generate_npn_orbits(n)):
+			orbit_size=len(orbit)
+			representative = orbit[0]
+			if quiet:
+				pass
+			elif verbose:
+				print(f"index: {i}, size: {orbit_size}, signatures: {orbit}")
+			else:
+				print(f"index: {i}, representative: {representative}")
+
+			sink.write(i, representative, orbit_size, orbit if verbose else None)
+
+			count += 1
+
+		record["items"] = count
+
+		if expect != count:
+			raise Exception(f"Inconsistent number of NPN classes. Got {count}, expected {expect} of them.")
+
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
+
+if __name__ == '__main__':
+	main()
@@ -1,32 +1,55 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.canon import compute_stabilizer_order
 
-def task(transposition, function, n):
+# Measured costs of the crossover between expanding a frontier in the calling process and on the worker pool:
+# starting the pool, its workers starting concurrently (1.36 s for 4 workers sharing a single core),
+# applying swap_variables to a signature, and sending an image back to the calling process
+POOL_START_TIME = 0.34
+SWAP_TIME = 0.87e-6
+RETURN_TIME = 0.3e-6
+
+def compute_pool_start_threshold(num_cores):
+	"""
+	Compute the number of images of a frontier from which starting a pool of num_cores workers pays off, namely
+	from which the time saved on swaps, less the time spent sending images back, exceeds the pool startup
+	Returns None when it never pays off
+	"""
+	saving = SWAP_TIME * (1 - 1 / num_cores) - RETURN_TIME
+	if saving <= 0:
+		return None
+	return math.ceil(POOL_START_TIME / saving)
+
+def task(transpositions, chunk, n):
 	"""
 	Atomic task
+	Apply every generator to every signature of a chunk of the frontier
+	Images are deduplicated before being sent back, as most of them are reached from several signatures
 	"""
-	permutation = convert_transposition_to_permutation(transposition, n)
-	new_function = action(permutation, function)
-	new_signature = compute_signature(new_function,n)
-	return new_signature
+	return list({swap_variables(signature, i, j, n) for signature in chunk for i, j in transpositions})
 
 def main():
-	print_header()
-
 	# Create the parser
-	parser = argparse.ArgumentParser(description='Computation of the orbit of a n-input, 1-output Boolean function specified via its signature as a LE integer under the action of the symmetric group Sn via its transpositions.')
+	parser = argparse.ArgumentParser(description='Computation of the orbit of a n-input, 1-output Boolean function specified via its signature as a LE integer under the action of the symmetric group Sn as the closure of its transpositions.')
 
 	# Add the arguments
 	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
 	parser.add_argument('--s', type=int, default=12, help='Signature')
 	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
+	parser.add_argument('--max-size', type=int, default=None, help='Maximum orbit size')
+	parser.add_argument('--size-only', action='store_true', help='Output the orbit size from the stabilizer only')
+	parser.add_argument('--check', action='store_true', help='Check the orbit size against enumeration')
+	parser.add_argument('--pool-threshold', type=int, default=None, help='Number of images of a frontier from which the worker pool is started, derived from the number of cores by default')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+	profiler.track_cache("compute_delta_swap_mask", compute_delta_swap_mask)
 
 	# signature
 	signature = args.s
@@ -34,36 +57,112 @@ def main():
 	# number of inputs
 	n=args.n
 
-	# number of cores
-	num_cores=args.c
-
-	# Computing symmetric group
-	permutations = generate_transpositions(n)
-	permutations += [()]
-
-	# Computing function
-	function = generate_function(signature, n)
-
-	# Total number of permutations
-	size = len(permutations)
-
-	# Define the number of jobs
-	num_jobs = size
-
-	with tqdm_joblib(tqdm(desc="Brut force orbit computing", total=size)) as progress_bar:
-		results = Parallel(n_jobs=num_cores)(delayed(task)(permutation, function, n) for permutation in permutations)
-
-	# Get unique elements from results and sort
-	orbit = list(set(results))
-	orbit.sort()
+	# number of cores, negative numbers counting down from the number of cores of the machine
+	num_cores=compute_effective_num_cores(args.c)
+
+	# maximum orbit size
+	max_size=args.max_size
+
+	# orbit size only output
+	size_only=args.size_only
+
+	# orbit size check
+	check=args.check
+
+	# number of images of a frontier from which the worker pool is started
+	pool_threshold = args.pool_threshold
+	if pool_threshold is None:
+		pool_threshold = compute_pool_start_threshold(num_cores)
+
+	if not 0 <= signature < 2**(2**n):
+		raise Exception(f"Signature {signature} out of range for {n} inputs.")
+
+	# Orbit-stabilizer theorem, its canonical search being only run when its result is asked for
+	if size_only or check:
+		with profiler.phase("stabilizer computing") as record:
+			stabilizer_order = compute_stabilizer_order(signature, n)
+			orbit_size = math.factorial(n) // stabilizer_order
+			record["items"] = 1
+
+	if size_only and not check:
+		print(f"Orbit of {signature} under the action of S{n} on 2^2^{n}")
+		print(f"Stabilizer order: {stabilizer_order}")
+		print(f"Orbit size: {orbit_size}")
+		profiler.report(args.profile)
+		if not args.no_banner:
+			print_footer()
+		return
+
+	# Computing symmetric group generators
+	transpositions = generate_transpositions(n)
+
+	# Breadth first closure, the frontier being the signatures found at the previous level
+	visited = {signature}
+	frontier = [signature]
+
+	with profiler.phase("orbit closure computing") as record:
+		with contextlib.ExitStack() as stack:
+			# Small frontiers are expanded in the calling process, the progress bar and the worker pool being only
+			# opened for the first large enough one
+			progress_bar = None
+			parallel = None
+			while frontier:
+				images = len(frontier) * len(transpositions)
+				if parallel is None:
+					sequential = num_cores == 1 or pool_threshold is None or images < pool_threshold
+				else:
+					sequential = is_sequential(num_cores, images)
+				if progress_bar is None and images >= SEQUENTIAL_THRESHOLD:
+					progress_bar = stack.enter_context(open_progress_bar(True, desc="Orbit closure computing", total=orbit_size if check else None, unit=" signatures"))
+					progress_bar.update(len(visited))
+
+				# Split the frontier into one chunk per core
+				chunks = [frontier] if sequential else chunk_list(frontier, max(64, -(-len(frontier) // num_cores)))
+				record["jobs"] += len(chunks)
+				if len(chunks) > 1:
+					joblib = import_joblib()
+					if parallel is None:
+						parallel = stack.enter_context(joblib.Parallel(n_jobs=num_cores))
+						profiler.record_untracked_workers(record, num_cores)
+					results = parallel(joblib.delayed(task)(transpositions, chunk, n) for chunk in chunks)
+				else:
+					results = [task(transpositions, chunk, n) for chunk in chunks]
+
+				frontier = []
+				for new_signatures in results:
+					for new_signature in new_signatures:
+						if new_signature not in visited:
+							visited.add(new_signature)
+							frontier.append(new_signature)
+				if progress_bar is not None:
+					progress_bar.update(len(frontier))
+
+				if max_size is not None and len(visited) > max_size:
+					raise Exception(f"Orbit of {signature} exceeds {max_size} elements.")
+
+		record["items"] = len(visited)
+
+	# Sort the elements of the orbit
+	orbit = sorted(visited)
+
+	if check and len(orbit) != orbit_size:
+		raise Exception(f"Inconsistent orbit size. Enumerated {len(orbit)} elements, expected {orbit_size} of them from the stabilizer.")
 
 	# Printing orbit of input function
-	print(f"Orbit of {signature} under the action of S{n} on 2^2^{n}")
-	for i, element in enumerate(orbit):
-		print(f"index: {i:{0}{len(str(len(orbit)))}} element: {element}")
-	print(f"{len(orbit)} elements found.")
-
-	print_footer()
+	with profiler.phase("printing") as record:
+		print(f"Orbit of {signature} under the action of S{n} on 2^2^{n}")
+		if size_only:
+			print(f"Stabilizer order: {stabilizer_order}")
+			print(f"Orbit size: {orbit_size}")
+		else:
+			for i, element in enumerate(orbit):
+				print(f"index: {i:{0}{len(str(len(orbit)))}} element: {element}")
+			print(f"{len(orbit)} elements found.")
+			record["items"] = len(orbit)
+
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
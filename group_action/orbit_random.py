@@ -1,45 +1,50 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.canon import compute_orbit_size
 import random
 
-def atomic_task(transposition, function, n):
+def atomic_task(item, n, size_only, check):
 	"""
 	Atomic task
+	Compute the orbit size of a signature from its stabilizer or by enumerating its orbit
 	"""
-	permutation = convert_transposition_to_permutation(transposition, n)
-	new_function = action(permutation, function)
-	new_signature = compute_signature(new_function,n)
-	return new_signature
-
-def task(permutations, item, n):
+	iteration = item[0]
+	signature = item[1]
+	if size_only or check:
+		orbit_size = compute_orbit_size(signature, n)
+	if check:
+		enumerated_size = len(compute_orbit(signature, n))
+		if enumerated_size != orbit_size:
+			raise Exception(f"Inconsistent orbit size for {signature}. Enumerated {enumerated_size} elements, expected {orbit_size} of them from the stabilizer.")
+	elif not size_only:
+		orbit_size = len(compute_orbit(signature, n))
+	return [iteration, signature, orbit_size]
+
+def task(chunk, n, size_only, check):
 	"""
 	Task
 	"""
-	iteration = item[0]
-	signature = item[1]
-	function = item[2]
-	result = []
-	for permutation in permutations:
-		result += [atomic_task(permutation, function, n)]
-	return [iteration, signature, result]
+	return [atomic_task(item, n, size_only, check) for item in chunk]
 
 def main():
-	print_header()
-
 	# Create the parser
-	parser = argparse.ArgumentParser(description='Iterate on brut force computation of random orbit of n-input, 1-output Boolean function specified via its signature as a LE integer under the action of the symmetric group Sn.')
+	parser = argparse.ArgumentParser(description='Iterate on computation of random orbit of n-input, 1-output Boolean function specified via its signature as a LE integer under the action of the symmetric group Sn.')
 
 	# Add the arguments
 	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
 	parser.add_argument('--i', type=int, default=1, help='iterations')
 	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
+	parser.add_argument('--size-only', action='store_true', help='Compute orbit sizes from stabilizers only')
+	parser.add_argument('--check', action='store_true', help='Check orbit sizes against enumeration')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
 
 	# iterations
 	iterations = args.i
@@ -47,50 +52,63 @@ def main():
 	# number of inputs
 	n=args.n
 
-	# number of cores
-	num_cores=args.c
+	# number of cores, negative numbers counting down from the number of cores of the machine
+	num_cores=compute_effective_num_cores(args.c)
+
+	# orbit size only computation
+	size_only=args.size_only
+
+	# orbit size check
+	check=args.check
+
+	# Largest orbit size
+	size = math.factorial(n)
 
-	# Computing symmetric group
-	permutations = generate_transpositions(n)
-	permutations += [()]
+	with profiler.phase("function generation") as record:
+		functions = []
 
-	# Total number of permutations
-	size = len(permutations)
+		max_format = 0
+		for iteration in range(iterations):
 
-	# Define the number of jobs
-	num_jobs = size
+			# generate a random signature in the range 0-2^2^n-1
+			signature = random.randrange(2**(2**n))
 
-	functions = []
+			it = len(str(signature))
+			if it > max_format:
+				max_format = it
 
-	max_format = 0
-	for iteration in range(iterations):
+			# Computing functions
+			functions += [[iteration+1, signature]]
+		record["items"] = iterations
 
-		# generate a random signature in the range 0-2^2^n-1
-		signature = random.randrange(2**(2**n))
+	# Define the chunk size
+	chunk_size = max(1, iterations // (4 * num_cores))
 
-		it = len(str(signature))
-		if it > max_format:
-			max_format = it
-		
-		# compute function
-		function = generate_function(signature, n)
-		
-		# Computing functions
-		functions += [[iteration+1, signature, function]]
+	# Split the list into chunks
+	chunks = chunk_list(functions, chunk_size)
 
-	# execute tasks	
-	with tqdm_joblib(tqdm(desc="Iterate on brut force orbit computing", total=iterations)) as progress_bar:
-		results = Parallel(n_jobs=num_cores)(delayed(task)(permutations, item, n) for item in functions)
+	# execute tasks, in the calling process for a few small functions
+	with profiler.phase("orbit size computing") as record:
+		if is_sequential(num_cores, iterations * 2**n):
+			results = [task(chunk, n, size_only, check) for chunk in chunks]
+		else:
+			joblib = import_joblib()
+			profiler.record_untracked_workers(record, num_cores)
+			with tqdm_joblib(open_progress_bar(True, desc="Iterate on orbit size computing", total=len(chunks))) as progress_bar:
+				results = joblib.Parallel(n_jobs=num_cores)(joblib.delayed(task)(chunk, n, size_only, check) for chunk in chunks)
+		record["items"] = iterations
+		record["jobs"] = len(chunks)
 
-	for result in results:
+	with profiler.phase("printing") as record:
+		for result in itertools.chain.from_iterable(results):
 
-		# Get unique elements from results and sort
-		orbit = list(set(result[2]))
-	
-		# print result
-		print(f"iteration: {result[0]:{0}{len(str(iterations))}} signature: {result[1]:{0}{max_format}} orbit size: {len(orbit):{0}{len(str(size))}}.")
+			# print result
+			print(f"iteration: {result[0]:{0}{len(str(iterations))}} signature: {result[1]:{0}{max_format}} orbit size: {result[2]:{0}{len(str(size))}}.")
+		record["items"] = iterations
 
-	print_footer()
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
@@ -1,23 +1,22 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.out_of_core import compute_orbits_out_of_core, get_out_of_core_paths
+from group_action.sinks import *
+import numpy as np
 
-def task(transposition, chunk, n):
+def task(generator_index, start, stop, n, path):
 	"""
 	Atomic task
+	Permute the whole range of signatures start to stop-1 at once and write their images into the shared image array
 	"""
-	partial_edges = []
-	permutation = convert_transposition_to_permutation(transposition, n)
-	for function in chunk:
-		new_function = action(permutation, function)
-		partial_edges += [(compute_signature(function,n), compute_signature(new_function,n))]
-	return partial_edges
+	table = generate_transposition_tables(n)[generator_index]
+	images = attach_shared_array(path)
+	images[generator_index, start:stop] = apply_permutation_table_to_range(table, start, stop, n)
 
 def main():
 	"""
 	Compute the orbits generated by the action of Sn on B^B^n.
 	"""
-	print_header()
-
 	# Create the parser
 	parser = argparse.ArgumentParser(description='Brut force computation of the orbits generated by the action of the symmetric group Sn on n-input Boolean functions.')
 
@@ -28,12 +27,20 @@ def main():
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
 	parser.add_argument('--v', action='store_true', help='Output every element of each orbit')
 	parser.add_argument('--j', action='store_true', help='Output data.json file')
+	parser.add_argument('--method', choices=['graph', 'canonical', 'out-of-core'], default='graph', help='Orbit computation method')
+	parser.add_argument('--path', type=str, default='.', help='Out-of-core bitset, orbit stream and checkpoint directory')
+	parser.add_argument('--range', type=int, default=2**20, help='Out-of-core number of signatures per checkpoint')
+	parser.add_argument('--output', type=str, default=None, help='Orbit output file, written as orbits are computed')
+	parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=None, help='Orbit output file format, guessed from its extension by default')
+	parser.add_argument('--quiet', action='store_true', help='Only print the number of orbits')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
 
 	"""
 	Initialize Default value
@@ -51,67 +58,87 @@ def main():
 	# json data output
 	json_data_output = args.j
 
-	# Computing symmetric group
-	permutations = generate_transpositions(n)
-
-	# Computing functions
-	functions = generate_functions(n)
-
-	# Total number of functions
-	size = 2**(2**n)
-
-	# Define the chunk size
-	chunk_size = 2**(n+2)
-
-	# Define the number of jobs
-	num_jobs = len(permutations) * size // chunk_size
-
-	# Split the list into chunks
-	chunks = chunk_list(functions, chunk_size)
-
-	with tqdm_joblib(tqdm(desc="Brut force orbit computing", total=num_jobs)) as progress_bar:
-		results = Parallel(n_jobs=num_cores)(delayed(task)(permutation, chunk, n) for permutation in permutations for chunk in chunks)
-
-	# Generating vertices
-	vertices = [k for k in range(size)]
-
-	# Merging list of lists
-	edges = list(itertools.chain.from_iterable(results))
-
-	# Computing orbits
-	orbits = find_connected_components(vertices, edges)
-
-	size = len(orbits)
-
-	# data list
-	data = []
-
-	# Printing orbits
-	print(f"Set of {n}-input Boolean functions orbits")
-	for i, orbit in enumerate(orbits):
-		orbit_size=len(orbit)
-		signatures = [orbit[k] for k in range(len(orbit))]
-		representative = signatures[0]
-		if verbose:
-			print(f"index: {i}, size: {orbit_size}, signatures: {signatures}")
-		else:
-			print(f"index: {i}, representative: {representative}")
-
-		if json_data_output:
-			if verbose:
-				data += [{"index": i, "size": orbit_size, "signatures": signatures}]
+	# orbit computation method
+	method = args.method
+
+	# orbit output file and format
+	output_path = args.output
+	output_format = args.output_format
+
+	# console output of the number of orbits only
+	quiet = args.quiet
+
+	if method == 'out-of-core':
+		# Computing orbits range by range, resuming from the last checkpoint if any
+		with profiler.phase("out-of-core orbit computing") as record, open_progress_bar(True, desc="Out-of-core orbit computing", total=2**(2**n), unit=" signatures") as progress_bar:
+			num_orbits = compute_orbits_out_of_core(n, args.path, args.range, progress_bar)
+			record["items"] = 2**(2**n)
+		print(f"Set of {n}-input Boolean functions orbits")
+		print(f"Number of orbits: {num_orbits}")
+		print(f"Representatives and sizes written to {get_out_of_core_paths(n, args.path)[1]}")
+		profiler.report(args.profile)
+		if not args.no_banner:
+			print_footer()
+		return
+
+	if method == 'graph':
+		profiler.track_cache("compute_transposition_table", compute_transposition_table)
+
+	if method == 'canonical':
+		# Computing orbits one canonical representative at a time
+		orbits = generate_canonical_orbits(n)
+	else:
+		# Number of transpositions generating the symmetric group
+		num_generators = len(generate_transpositions(n))
+
+		# Total number of functions
+		size = 2**(2**n)
+
+		# Image of each signature under each generator, written in place by the workers
+		with SharedArray((num_generators, size), np.uint64) as images:
+			with profiler.phase("image computing") as record:
+				with open_progress_bar(num_generators * size >= SEQUENTIAL_THRESHOLD, desc="Brut force orbit computing", total=num_generators * size, unit=" edges") as progress_bar, Scheduler(num_cores, caches=profiler.caches) as scheduler:
+					for _ in scheduler.map(task, num_generators, size, (n, images.path), progress_bar):
+						pass
+				profiler.record_scheduler(record, scheduler)
+
+			# Computing orbits
+			with profiler.phase("component finding") as record:
+				orbits = find_components_from_images(images.array)
+				record["items"] = images.array.size
+
+	# Output sinks, data.json being the legacy one
+	sinks = []
+	if output_path is not None:
+		sinks += [open_sink(output_path, output_format, compute_signature_width(n), compute_orbit_size_width(n))]
+	if json_data_output:
+		sinks += [LegacyJsonSink('data.json', make_legacy_orbit_record)]
+
+	# Printing orbits, computed on the fly by the canonical method
+	with profiler.phase("orbit computing and printing" if method == 'canonical' else "printing") as record, Sinks(sinks) as sink:
+		if not quiet:
+			print(f"Set of {n}-input Boolean functions orbits")
+		for i, orbit in enumerate(orbits):
+			orbit_size=len(orbit)
+			signatures = [orbit[k] for k in range(len(orbit))]
+			representative = signatures[0]
+			if quiet:
+				pass
+			elif verbose:
+				print(f"index: {i}, size: {orbit_size}, signatures: {signatures}")
 			else:
-				data += [{"index": i, "representative": representative}]
+				print(f"index: {i}, representative: {representative}")
 
-	if json_data_output:
-		# Specify the filename
-		filename = 'data.json'
+			sink.write(i, representative, orbit_size, signatures if verbose else None)
+
+			record["items"] += 1
 
-		# Write the dictionary to a JSON file
-		with open(filename, 'w') as file:
-			json.dump(data, file, indent=4)  # indent=4 for pretty printing
+	if quiet:
+		print(f"Number of orbits: {record['items']}")
 
-	print_footer()
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
@@ -0,0 +1,111 @@
+from group_action.library import *
+import gzip
+import mmap
+import os
+
+def get_out_of_core_paths(n, directory):
+	"""
+	Compute the paths of the visited bitset, of the orbit stream and of the checkpoint of n-input Boolean functions
+	"""
+	return (os.path.join(directory, f"visited_{n}.bitset"),
+		os.path.join(directory, f"orbits_{n}.gz"),
+		os.path.join(directory, f"checkpoint_{n}.json"))
+
+def read_checkpoint(path):
+	"""
+	Read a checkpoint, None if there is none yet
+	"""
+	if not os.path.exists(path):
+		return None
+	with open(path, 'r') as file:
+		return json.load(file)
+
+def write_checkpoint(path, checkpoint):
+	"""
+	Write a checkpoint aside and rename it so that an interruption never leaves a partial checkpoint
+	"""
+	temporary_path = path + ".tmp"
+	with open(temporary_path, 'w') as file:
+		json.dump(checkpoint, file)
+		file.flush()
+		os.fsync(file.fileno())
+	os.replace(temporary_path, path)
+
+def read_orbit_stream(path):
+	"""
+	Generate the (representative, size) pairs of an orbit stream
+	"""
+	with gzip.open(path, 'rt') as file:
+		for line in file:
+			representative, size = line.split()
+			yield int(representative), int(size)
+
+def compute_orbits_out_of_core(n, directory, range_size=1<<20, progress_bar=None):
+	"""
+	Compute the orbits of the action of Sn on n-input Boolean functions with a memory-mapped bitset of visited signatures
+	Signatures are walked by ranges in increasing order, so the first signature reaching an orbit is its representative.
+	Each range appends the representatives and sizes of its orbits to a gzip stream as one gzip member, then the bitset
+	and the stream are flushed and a checkpoint records the next range, the stream length and the number of orbits.
+	Returns the number of orbits.
+
+	After an interruption, the stream is truncated back to the checkpoint. Orbits expanded after the checkpoint may have
+	left marks in the bitset, so the first range is walked again checking whether each signature is the minimum of its
+	orbit instead of trusting the bitset.
+	"""
+	size = 2**(2**n)
+	bitset_path, stream_path, checkpoint_path = get_out_of_core_paths(n, directory)
+	os.makedirs(directory, exist_ok=True)
+
+	checkpoint = read_checkpoint(checkpoint_path)
+	if checkpoint is None:
+		checkpoint = {"n": n, "next": 0, "offset": 0, "orbits": 0, "range": range_size}
+		# sparse file of 2^2^n bits, 512 MiB for n=5
+		with open(bitset_path, 'wb') as file:
+			file.truncate((size + 7) >> 3)
+		with open(stream_path, 'wb') as file:
+			pass
+	elif checkpoint["n"] != n:
+		raise Exception(f"Checkpoint {checkpoint_path} is for {checkpoint['n']} inputs, not {n}.")
+
+	# keeping the ranges of the interrupted run so that the range walked again covers the interrupted one
+	range_size = checkpoint["range"]
+	resumed = checkpoint["next"] > 0
+	if progress_bar is not None:
+		progress_bar.update(checkpoint["next"])
+
+	with open(bitset_path, 'r+b') as bitset_file, open(stream_path, 'r+b') as stream_file:
+		visited = mmap.mmap(bitset_file.fileno(), 0)
+		stream_file.truncate(checkpoint["offset"])
+		stream_file.seek(checkpoint["offset"])
+		try:
+			for start, stop in chunk_range(size, range_size):
+				if stop <= checkpoint["next"]:
+					continue
+				lines = []
+				for signature in range(max(start, checkpoint["next"]), stop):
+					marked = (visited[signature >> 3] >> (signature & 7)) & 1
+					if marked and not resumed:
+						continue
+					orbit = compute_orbit(signature, n)
+					if resumed and min(orbit) != signature:
+						continue
+					for element in orbit:
+						visited[element >> 3] |= 1 << (element & 7)
+					lines += [f"{signature} {len(orbit)}\n"]
+
+				# one gzip member per range, so that the stream can be truncated between ranges
+				with gzip.GzipFile(fileobj=stream_file, mode='wb') as member:
+					member.write("".join(lines).encode())
+				stream_file.flush()
+				os.fsync(stream_file.fileno())
+				visited.flush()
+
+				checkpoint = {"n": n, "next": stop, "offset": stream_file.tell(), "orbits": checkpoint["orbits"] + len(lines), "range": range_size}
+				write_checkpoint(checkpoint_path, checkpoint)
+				resumed = False
+				if progress_bar is not None:
+					progress_bar.update(stop - start)
+		finally:
+			visited.close()
+
+	return checkpoint["orbits"]
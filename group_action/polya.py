@@ -0,0 +1,92 @@
+from group_action.library import *
+
+def compute_fixed_points_by_weight(cycle_type, d):
+	"""
+	Count the points of B^n fixed by s^d according to their Hamming weight, s having the given cycle type
+	A cycle of length l of s splits into g=gcd(l,d) cycles of length l/g of s^d, and a fixed point is a union of them
+	"""
+	n = sum(cycle_type)
+	counts = [1] + [0] * n
+	for length in cycle_type:
+		g = math.gcd(length, d)
+		part = length // g
+		for _ in range(g):
+			# multiplying by 1 + t^part
+			for k in range(n, part - 1, -1):
+				counts[k] += counts[k - part]
+	return counts
+
+@memoize_by_cycle_type(encode=lambda cycles: [[d, k, count] for (d, k), count in cycles.items()],
+	decode=lambda cycles: {(d, k): count for d, k, count in cycles})
+def compute_cycles_by_weight(cycle_type):
+	"""
+	Count the cycles of a permutation of Sn acting on B^n according to their length and to the Hamming weight of their points
+	Returns a dictionary mapping (length, weight) to a number of cycles
+	"""
+	n = sum(cycle_type)
+	order = math.lcm(*cycle_type)
+	divisors = compute_divisors(order)
+	fixed = {d: compute_fixed_points_by_weight(cycle_type, d) for d in divisors}
+	cycles = {}
+	for d in divisors:
+		for k in range(n + 1):
+			# points of exact period d by Moebius inversion
+			points = sum(compute_moebius(d // e) * fixed[e][k] for e in divisors if d % e == 0)
+			if points:
+				cycles[(d, k)] = points // d
+	return cycles
+
+def compute_cycle_index(n):
+	"""
+	Compute the cycle index of Sn acting on B^n
+	Returns a list of (class size, monomial) pairs, the monomial mapping each cycle length d to the exponent of a_d
+	Z = 1/n! sum size.prod a_d^exponent
+	"""
+	cycle_index = []
+	for cycle_type in sorted(generate_partitions(n), key=compute_cycle_type_representative):
+		monomial = Counter()
+		for (d, k), count in compute_cycles_by_weight(cycle_type).items():
+			monomial[d] += count
+		cycle_index += [(compute_cycle_type_size(cycle_type), dict(sorted(monomial.items())))]
+	return cycle_index
+
+def compute_weight_enumerator(n, weights=None):
+	"""
+	Count the orbits of the action of Sn on n-input Boolean functions according to their weight
+	weights[k] is the weight of an input vector of Hamming weight k, namely an Sn invariant weighting of B^n
+	By default every input vector weighs 1, so the weight of a function is the size of its on-set
+	Returns the list of the coefficients of the generating polynomial, index w giving the number of orbits of weight w
+
+	Polya's theorem substitutes 1+y^(w.d) for each cycle of length d made of points of weight w in the cycle index.
+	Polynomials are packed into big integers (Kronecker substitution) so that products are big integer products.
+	"""
+	if weights is None:
+		weights = [1] * (n + 1)
+	if len(weights) != n + 1:
+		raise Exception(f"Expected {n + 1} weights, one per Hamming weight of input vectors, got {len(weights)}.")
+	if any(weight < 0 for weight in weights):
+		raise Exception(f"Weights of input vectors must be non negative, got {weights}.")
+	degree = sum(weights[k] * math.comb(n, k) for k in range(n + 1))
+
+	coefficients = [0] * (degree + 1)
+	for cycle_type in generate_partitions(n):
+		cycles = compute_cycles_by_weight(cycle_type)
+
+		# coefficients of this term are bounded by 2^(number of cycles), rounding slot width up to a number of bytes
+		slot_bytes = (sum(cycles.values()) + 1) // 8 + 1
+		slot = slot_bytes * 8
+
+		product = 1
+		for (d, k), count in cycles.items():
+			product *= (1 + (1 << (slot * d * weights[k]))) ** count
+
+		# unpacking and accumulating coefficients
+		size = compute_cycle_type_size(cycle_type)
+		packed = product.to_bytes((degree + 1) * slot_bytes, 'little')
+		for i in range(degree + 1):
+			coefficient = int.from_bytes(packed[i * slot_bytes:(i + 1) * slot_bytes], 'little')
+			if coefficient:
+				coefficients[i] += size * coefficient
+
+	factorial = math.factorial(n)
+	return [coefficient // factorial for coefficient in coefficients]
@@ -1,27 +1,60 @@
 from group_action import __version__, __num_of_cores__
 from group_action.library import *
+from group_action.sinks import *
+import numpy as np
 from functools import lru_cache
 
+def convert_subset_to_int(A):
+	"""
+	Convert a subset of X={0, ..., n-1} given by its elements into its n-bit mask
+	"""
+	result = 0
+	for x in A:
+		result |= 1 << x
+	return result
+
 def convert_int(hypergraph, n):
-	return convert_bits_to_int(hypergraph_to_bool_func(hypergraph, n))
+	"""
+	Compute the signature of a hypergraph given by its hyperedges, as n-bit masks or as subsets of X={0, ..., n-1}
+	Bit A of the signature is set when the subset of mask A is a hyperedge
+	"""
+	result = 0
+	for hyperedge in hypergraph:
+		if not isinstance(hyperedge, int):
+			hyperedge = convert_subset_to_int(hyperedge)
+		result |= 1 << hyperedge
+	return result
+
+def subset(i, X):
+	"""
+	Compute the subset of X made of the elements X[k] for each bit k set in i
+	"""
+	return tuple(X[k] for k in range(len(X)) if (i >> k) & 1)
 
 def power_set(X):
 	"""
 	Generate power set of X
+	Subsets are computed on demand in binary counting order, index i being the subset given by the bits of i
 	"""
-	# assert X is a list
-	if not (type(X) is list):
-		raise Exception("Input is not a list")
+	# assert X is a sequence
+	if not isinstance(X, Sequence):
+		raise Exception("Input is not a sequence")
 
-	# Chain together all combinations of different lengths
-	return list(itertools.chain.from_iterable(itertools.combinations(X, r) for r in range(len(X) + 1)))
+	return LazySequence(2**len(X), subset, (X,))
+
+def generate_hypergraphs(n):
+	"""
+	Generate P(P(X)) with X={0, ..., n-1} as 2^n-bit masks
+	Hypergraph i has a hyperedge A for each bit A set in i, namely its signature as a Boolean function is i itself
+	"""
+	return range(2**(2**n))
 
 def action1(g, x):
 	"""
 	First action
 	G, X, g.x
-	g is a list representing a 2-cycle or g is a 0-cycle
-	ex: g=[1,2] means g(1) = 2, g(2) = 1, g(other) = other
+	g is a tuple representing a 2-cycle or g is a 0-cycle
+	ex: g=(1,2) means g(1) = 2, g(2) = 1, g(other) = other
 	"""
 	result = x
 	if x in g:
@@ -30,21 +63,49 @@ def action1(g, x):
 			result = g[1]
 	return result
 
-@lru_cache(None)
+@lru_cache(maxsize=4096)
 def action2(g, A):
 	"""
 	Second action
 	G, P(X), g.A = {g.x, x in A}
+	A is given by its n-bit mask, and so is g.A
 	"""
-	result = [action1(g, x) for x in A]
+	result = 0
+	for x in range(A.bit_length()):
+		if (A >> x) & 1:
+			result |= 1 << action1(g, x)
 	return result
 
-def action3(g, B):
+@lru_cache(maxsize=1024)
+def compute_subset_image_table(g, n):
+	"""
+	Compute the image g.A of every subset A of X={0, ..., n-1}, index A giving the mask of g.A
+	"""
+	return tuple(action2(g, A) for A in range(2**n))
+
+@lru_cache(maxsize=1024)
+def compute_hypergraph_image_tables(g, n):
+	"""
+	Compute the image under g of each byte of a hypergraph
+	Table k maps the 256 values of byte k to the mask of their images, so that g.B is the OR of the images of the bytes of B
+	"""
+	table = compute_subset_image_table(g, n)
+	tables = []
+	for offset in range(0, 2**n, 8):
+		width = min(8, 2**n - offset)
+		tables += [tuple(sum(1 << table[offset + k] for k in range(width) if (byte >> k) & 1) for byte in range(256))]
+	return tables
+
+def action3(g, B, n):
 	"""
 	Third action
 	G, P(P(X)), g.B = {g.A, A in B}
+	B is given by its 2^n-bit mask, and so is g.B
 	"""
-	result = [action2(g, A) for A in B]
+	result = 0
+	for table in compute_hypergraph_image_tables(g, n):
+		result |= table[B & 255]
+		B >>= 8
 	return result
 
 def hypergraph_to_bool_func(hypergraph, n):
@@ -52,39 +113,35 @@ def hypergraph_to_bool_func(hypergraph, n):
 	Convert a hypergraph to a Boolean function (truth table).
 	
 	Parameters:
-	- hypergraph: Set of hyperedges. Each hyperedge is a subset of {0, 1, ..., n-1}.
+	- hypergraph: Set of hyperedges as a 2^n-bit mask. Each hyperedge is a subset of {0, 1, ..., n-1}.
 	- n: Number of variables (nodes in the hypergraph)
 	
 	Returns:
 	- bool_func: List of Boolean outputs for each input combination of n variables (size 2^n)
 	"""
-	bool_func = [0] * (2 ** n)
-	
-	# Iterate over all possible input combinations (binary numbers)
-	for hyperedge in hypergraph:
-		i=0
-		for pos in hyperedge:
-			i += 1 << pos
-		bool_func[i] = 1
+	return [(hypergraph >> i) & 1 for i in range(2 ** n)]
 
-	return bool_func
+def generate_generators(n):
+	"""
+	Generate the transpositions of Sn and the identity
+	"""
+	return generate_transpositions(n) + [()]
 
-def task(transposition, chunk, n):
+def task(generator_index, start, stop, n, path):
 	"""
 	Atomic task
+	The chunk of hypergraphs is generated locally from its range, hypergraph i having signature i,
+	and the signatures of their images are written into the shared image array
 	"""
-	partial_edges = []
-	for function in chunk:
-		new_function = action3(transposition, function)
-		partial_edges += [[convert_int(function,n), convert_int(new_function,n)]]
-	return partial_edges
+	g = generate_generators(n)[generator_index]
+	new_signatures = [action3(g, hypergraph, n) for hypergraph in generate_hypergraphs(n)[start:stop]]
+	images = attach_shared_array(path)
+	images[generator_index, start:stop] = new_signatures
 
 def main():
 	"""
 	Compute the orbits generated by the action of Sn on B^B^n.
 	"""
-	print_header()
-
 	# Create the parser
 	parser = argparse.ArgumentParser(description='Computation of the orbits generated by the action of the symmetric group Sn via its transpositions on n-input Boolean functions generated by actions on power sets.')
 
@@ -95,12 +152,20 @@ def main():
 	parser.add_argument('--c', type=int, default=__num_of_cores__, help='Number of cores')
 	parser.add_argument('--v', action='store_true', help='Output every element of each orbit')
 	parser.add_argument('--j', action='store_true', help='Output data.json file')
+	parser.add_argument('--output', type=str, default=None, help='Orbit output file, written as orbits are computed')
+	parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=None, help='Orbit output file format, guessed from its extension by default')
+	parser.add_argument('--quiet', action='store_true', help='Only print the number of orbits')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
+	profiler.track_cache("action2", action2)
+	profiler.track_cache("compute_subset_image_table", compute_subset_image_table)
+	profiler.track_cache("compute_hypergraph_image_tables", compute_hypergraph_image_tables)
 
 	"""
 	Initialize Default value
@@ -118,71 +183,64 @@ def main():
 	# json data output
 	json_data_output = args.j
 
-	# Computing symmetric group
-	permutations = generate_transpositions(n)
-	permutations += [()]
+	# orbit output file and format
+	output_path = args.output
+	output_format = args.output_format
+
+	# console output of the number of orbits only
+	quiet = args.quiet
 
-	# Computing functions
-	X = list(range(n))
-	PX = power_set(X)
-	PPX = power_set(PX)
-	functions = PPX
+	# Number of generators of the symmetric group
+	num_generators = len(generate_generators(n))
 
 	# Total number of functions
 	size = 2**(2**n)
 
-	# Define the chunk size
-	chunk_size = 2**(n+2)
-
-	# Define the number of jobs
-	num_jobs = len(permutations) * size // chunk_size
-
-	# Split the list into chunks
-	chunks = chunk_list(functions, chunk_size)
-
-	with tqdm_joblib(tqdm(desc="Brut force orbit computing", total=num_jobs)) as progress_bar:
-		results = Parallel(n_jobs=num_cores)(delayed(task)(permutation, chunk, n) for permutation in permutations for chunk in chunks)
-
-	# Generating vertices
-	vertices = [k for k in range(size)]
-
-	# Merging list of lists
-	edges = list(itertools.chain.from_iterable(results))
-
-	# Computing orbits
-	orbits = find_connected_components(vertices, edges)
-
-	size = len(orbits)
-
-	# data list
-	data = []
+	# Image of each signature under each generator, written in place by the workers
+	with SharedArray((num_generators, size), np.uint64) as images:
+		with profiler.phase("image computing") as record:
+			with open_progress_bar(num_generators * size >= SEQUENTIAL_THRESHOLD, desc="Brut force orbit computing", total=num_generators * size, unit=" edges") as progress_bar, Scheduler(num_cores, caches=profiler.caches) as scheduler:
+				for _ in scheduler.map(task, num_generators, size, (n, images.path), progress_bar):
+					pass
+			profiler.record_scheduler(record, scheduler)
+
+		# Computing orbits
+		with profiler.phase("component finding") as record:
+			orbits = find_components_from_images(images.array)
+			record["items"] = images.array.size
+
+	# Output sinks, data.json being the legacy one
+	sinks = []
+	if output_path is not None:
+		sinks += [open_sink(output_path, output_format, compute_signature_width(n), compute_orbit_size_width(n))]
+	if json_data_output:
+		sinks += [LegacyJsonSink('data.json', make_legacy_orbit_record)]
 
 	# Printing orbits
-	print(f"Set of {n}-input Boolean functions orbits")
-	for i, orbit in enumerate(orbits):
-		orbit_size=len(orbit)
-		signatures = [orbit[k] for k in range(len(orbit))]
-		representative = signatures[0]
-		if verbose:
-			print(f"index: {i}, size: {orbit_size}, signatures: {signatures}")
-		else:
-			print(f"index: {i}, representative: {representative}")
-
-		if json_data_output:
-			if verbose:
-				data += [{"index": i, "size": orbit_size, "signatures": signatures}]
+	with profiler.phase("printing") as record, Sinks(sinks) as sink:
+		if not quiet:
+			print(f"Set of {n}-input Boolean functions orbits")
+		for i, orbit in enumerate(orbits):
+			orbit_size=len(orbit)
+			signatures = [orbit[k] for k in range(len(orbit))]
+			representative = signatures[0]
+			if quiet:
+				pass
+			elif verbose:
+				print(f"index: {i}, size: {orbit_size}, signatures: {signatures}")
 			else:
-				data += [{"index": i, "representative": representative}]
+				print(f"index: {i}, representative: {representative}")
 
-	if json_data_output:
-		# Specify the filename
-		filename = 'data.json'
+			sink.write(i, representative, orbit_size, signatures if verbose else None)
+
+			record["items"] += 1
 
-		# Write the dictionary to a JSON file
-		with open(filename, 'w') as file:
-			json.dump(data, file, indent=4)  # indent=4 for pretty printing
+	if quiet:
+		print(f"Number of orbits: {record['items']}")
 
-	print_footer()
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
@@ -0,0 +1,203 @@
+from group_action.library import *
+import numpy as np
+import gzip
+
+"""
+Output sinks writing orbits one at a time as they are produced, instead of accumulating them for data.json
+Every sink has the same write(index, representative, size, members=None) and close() methods and is a context manager.
+"""
+
+# File layout of the columnar format: a header, then blocks of up to COLUMNAR_BLOCK_SIZE orbits stored column by column
+COLUMNAR_MAGIC = b"GAORBCOL"
+COLUMNAR_VERSION = 1
+COLUMNAR_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("width", "<u4"), ("size_width", "<u4")])
+COLUMNAR_BLOCK_HEADER = np.dtype([("count", "<u4"), ("members", "<u4")])
+COLUMNAR_BLOCK_SIZE = 4096
+
+OUTPUT_FORMATS = ['jsonl', 'jsonl.gz', 'columnar', 'columnar.gz']
+
+def open_output_file(path, compressed, mode):
+	"""
+	Open an output file, gzip compressed or not
+	"""
+	if compressed:
+		return gzip.open(path, mode)
+	return open(path, mode)
+
+class JsonLinesSink:
+	"""
+	Write one JSON object per orbit and per line
+	"""
+	def __init__(self, path, compressed=False):
+		self.file = open_output_file(path, compressed, 'wt')
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def write(self, index, representative, size, members=None):
+		record = {"index": index, "size": size, "representative": representative}
+		if members is not None:
+			record["members"] = members
+		self.file.write(json.dumps(record) + "\n")
+
+	def close(self):
+		self.file.close()
+
+class ColumnarSink:
+	"""
+	Write orbits in blocks, each block holding the representatives as packed little-endian integers of width bytes,
+	then the sizes as packed integers of size_width bytes, then optionally the members of every orbit of the block
+	encode converts representatives and members into non negative integers, signatures being integers already
+	"""
+	def __init__(self, path, width, size_width, compressed=False, encode=None):
+		self.file = open_output_file(path, compressed, 'wb')
+		self.width = width
+		self.size_width = size_width
+		self.encode = encode
+		self.block = []
+		self.file.write(np.array([(COLUMNAR_MAGIC, COLUMNAR_VERSION, width, size_width)], dtype=COLUMNAR_HEADER).tobytes())
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def pack(self, values):
+		if self.encode is not None:
+			values = [self.encode(value) for value in values]
+		return b"".join(value.to_bytes(self.width, 'little') for value in values)
+
+	def write(self, index, representative, size, members=None):
+		self.block.append((representative, size, members))
+		if len(self.block) == COLUMNAR_BLOCK_SIZE:
+			self.flush()
+
+	def flush(self):
+		if not self.block:
+			return
+		members = all(orbit_members is not None for _, _, orbit_members in self.block)
+		self.file.write(np.array([(len(self.block), members)], dtype=COLUMNAR_BLOCK_HEADER).tobytes())
+		self.file.write(self.pack([representative for representative, _, _ in self.block]))
+		self.file.write(b"".join(size.to_bytes(self.size_width, 'little') for _, size, _ in self.block))
+		if members:
+			self.file.write(b"".join(self.pack(orbit_members) for _, _, orbit_members in self.block))
+		self.block = []
+
+	def close(self):
+		self.flush()
+		self.file.close()
+
+def read_columnar(path):
+	"""
+	Generate the (representative, size, members) triples of a columnar file, members being None when not stored
+	"""
+	with open_output_file(path, path.endswith('.gz'), 'rb') as file:
+		header = np.frombuffer(file.read(COLUMNAR_HEADER.itemsize), dtype=COLUMNAR_HEADER)
+		if len(header) != 1 or header["magic"][0] != COLUMNAR_MAGIC or header["version"][0] != COLUMNAR_VERSION:
+			raise Exception(f"{path} is not a columnar orbit file.")
+		width = int(header["width"][0])
+		size_width = int(header["size_width"][0])
+		while True:
+			data = file.read(COLUMNAR_BLOCK_HEADER.itemsize)
+			if not data:
+				break
+			block_header = np.frombuffer(data, dtype=COLUMNAR_BLOCK_HEADER)
+			count = int(block_header["count"][0])
+			data = file.read(count * width)
+			representatives = [int.from_bytes(data[i * width:(i + 1) * width], 'little') for i in range(count)]
+			data = file.read(count * size_width)
+			sizes = [int.from_bytes(data[i * size_width:(i + 1) * size_width], 'little') for i in range(count)]
+			for representative, size in zip(representatives, sizes):
+				members = None
+				if block_header["members"][0]:
+					data = file.read(size * width)
+					members = [int.from_bytes(data[i * width:(i + 1) * width], 'little') for i in range(size)]
+				yield representative, size, members
+
+class LegacyJsonSink:
+	"""
+	Write the legacy data.json, a JSON array indented by 4 spaces, which can only be written once complete
+	make_record builds each element of the array from the arguments of write
+	"""
+	def __init__(self, path, make_record):
+		self.path = path
+		self.make_record = make_record
+		self.data = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def write(self, index, representative, size, members=None):
+		self.data += [self.make_record(index, representative, size, members)]
+
+	def close(self):
+		# Write the dictionary to a JSON file
+		with open(self.path, 'w') as file:
+			json.dump(self.data, file, indent=4)  # indent=4 for pretty printing
+
+def make_legacy_orbit_record(index, representative, size, signatures):
+	"""
+	Build an element of the legacy data.json of orbits of Boolean functions, listing their signatures in verbose mode
+	"""
+	if signatures is not None:
+		return {"index": index, "size": size, "signatures": signatures}
+	return {"index": index, "representative": representative}
+
+def compute_signature_width(n):
+	"""
+	Compute the number of bytes of a packed signature of an n-input Boolean function
+	"""
+	return max(1, ((1 << n) + 7) >> 3)
+
+def compute_orbit_size_width(n):
+	"""
+	Compute the number of bytes of a packed orbit size under Sn, at most n!
+	"""
+	return max(1, (math.factorial(n).bit_length() + 7) >> 3)
+
+def guess_output_format(path):
+	"""
+	Guess the output format of a path from its extension, JSON Lines by default
+	"""
+	compressed = path.endswith('.gz')
+	stem = path[:-3] if compressed else path
+	output_format = 'columnar' if stem.endswith(('.col', '.bin')) else 'jsonl'
+	return output_format + ('.gz' if compressed else '')
+
+def open_sink(path, output_format, width, size_width, encode=None):
+	"""
+	Open the sink of an output format, guessed from the path when not given
+	"""
+	if output_format is None:
+		output_format = guess_output_format(path)
+	if output_format not in OUTPUT_FORMATS:
+		raise Exception(f"Unknown output format: {output_format}. One of {OUTPUT_FORMATS} expected.")
+	compressed = output_format.endswith('.gz')
+	if output_format.startswith('columnar'):
+		return ColumnarSink(path, width, size_width, compressed, encode)
+	return JsonLinesSink(path, compressed)
+
+class Sinks:
+	"""
+	Broadcast orbits to several sinks, closing all of them at the end
+	"""
+	def __init__(self, sinks):
+		self.sinks = sinks
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		for sink in self.sinks:
+			sink.close()
+
+	def write(self, index, representative, size, members=None):
+		for sink in self.sinks:
+			sink.write(index, representative, size, members)
@@ -23,21 +23,46 @@ def compute_symmetric_functions(n, reduced=0):
 
 	return symmetric_functions
 
-def main():
-	print_header()
+def generate_symmetric_signatures(n):
+	"""
+	Generate the signatures of all the symmetric functions with n inputs, one at a time
+	Function i is 1 on the input vectors of Hamming weight k for each bit k set in i, namely the OR of their weight masks
+	"""
+	masks = compute_weight_masks(n)
+	for i in range(1 << (n + 1)):
+		signature = 0
+		for k in range(n + 1):
+			if (i >> k) & 1:
+				signature |= masks[k]
+		yield signature
+
+def is_symmetric(signature, n):
+	"""
+	Check whether a signature is the one of a symmetric function with n inputs
+	It is when it is constant on each set of input vectors of the same Hamming weight
+	"""
+	for mask in compute_weight_masks(n):
+		if signature & mask not in (0, mask):
+			return False
+	return signature >> (1 << n) == 0
 
+def main():
 	# Create the parser
 	parser = argparse.ArgumentParser(description='Generate each symmetric n-input 1-output Boolean function.')
 
 	# Add the arguments
 	parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
 	parser.add_argument('--n', type=int, default=2, help='Number of inputs')
+	parser.add_argument('--s', type=int, nargs='+', default=None, help='Check whether these signatures are symmetric instead')
+	parser.add_argument('--hex', action='store_true', help='Print signatures as hexadecimal LE integers')
+	parser.add_argument('--no-banner', action='store_true', help='Do not print the header, the arguments summary and the footer')
+	parser.add_argument('--profile', type=str, nargs='?', const='profile.json', default=None, help='Output a profile of each phase as a table and as a JSON file')
 
-	# Parse the arguments
-	args = parser.parse_args()
+	# Parse the arguments, printing the header and the arguments summary
+	args = parse_arguments(parser)
 
-	# Print arguments summary
-	print_arguments_summary(args, parser, __version__)
+	# phase profiling
+	profiler = Profiler(args.profile is not None)
 
 	"""
 	Initialize Default value
@@ -45,31 +70,53 @@ def main():
 
 	# number of inputs
 	n=args.n
-	
+
+	# signatures to check
+	signatures = args.s
+
+	# hexadecimal output
+	hex_output = args.hex
+
+	if signatures is not None:
+		with profiler.phase("symmetry checking") as record:
+			for signature in signatures:
+				print(f"signature: {signature}, symmetric: {is_symmetric(signature, n)}")
+			record["items"] = len(signatures)
+		profiler.report(args.profile)
+		if not args.no_banner:
+			print_footer()
+		return
+
 	# Computing symmetric functions whether reduced or not
 	expect = 1 << (n + 1)
 
-	symmetric_functions = compute_symmetric_functions(n)
-	
-	# Generating input vectors according to number of inputs
-	input_vectors = compute_input_vectors(n)
+	# signatures have 2^n bits, far beyond the default integer string conversion limit from n=15
+	sys.set_int_max_str_digits(0)
+
+	with profiler.phase("weight mask computing") as record:
+		compute_weight_masks(n)
+		record["items"] = n + 1
 
-	# Compute 
-	variable_names = [f"x{k}" for k in range(n)]
+	# signatures are generated while printed
+	with profiler.phase("function generation and printing") as record:
+		count=0
+		for signature_as_an_int in generate_symmetric_signatures(n):
+			if hex_output:
+				print(f"index: {count}, signature: {signature_as_an_int:#x}")
+			else:
+				print(f"index: {count}, signature: {signature_as_an_int}")
 
-	count=0
-	for symmetric_function in symmetric_functions:
-		signature_as_a_BE_bit_list = [symmetric_function(input_vector) for input_vector in input_vectors]
-		signature_as_an_int = convert_bits_to_int(signature_as_a_BE_bit_list)
-		print(f"index: {count}, signature: {signature_as_an_int}")
+			# index
+			count += 1
 
-		# index
-		count += 1
+		record["items"] = count
 
 	if expect != count:
 		raise Exception(f"Inconsistent number of symmetric functions. Got {count}, expected {expect} of them.")
 
-	print_footer()
+	profiler.report(args.profile)
+	if not args.no_banner:
+		print_footer()
 
 if __name__ == '__main__':
 	main()
@@ -18,6 +18,7 @@ setup(
 	python_requires='>=3.10',
 	install_requires=[
 		'joblib>=1.4.2',
+		'numpy>=1.26.4',
 		'tqdm>=4.66.4'
 	],
 	entry_points={
@@ -29,6 +30,9 @@ setup(
 			'burnside = group_action.burnside:main',
 			'powerset = group_action.powerset:main',
 			'symmetric_functions = group_action.symmetric_functions:main',
+			'lookup = group_action.lookup:main',
+			'canon = group_action.canon:main',
+			'npn = group_action.npn:main',
 		],
 	},
 